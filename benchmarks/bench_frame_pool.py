@@ -0,0 +1,81 @@
+'''
+Per-frame memory benchmark for the capture -> RGB -> preview image path
+Runs the old allocating path (cap.read(), cvtColor, flip) and the pooled path (FramePool + ScratchBuffer) on a fake
+camera, and uses tracemalloc to report how many bytes each frame allocates
+Run from repo root: python benchmarks/bench_frame_pool.py
+'''
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import cv2
+import numpy as np
+from config import FRAME_SIZE
+from framepool import FramePool, ScratchBuffer
+
+FRAME_SHAPE = (FRAME_SIZE['height'], FRAME_SIZE['width'], 3)
+
+
+class FakeCamera:
+    """cv2.VideoCapture stand-in - writes into image when one of the right shape is given, else allocates"""
+
+    def __init__(self, shape=FRAME_SHAPE):
+        self.source = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+
+    def read(self, image=None):
+        if image is None or image.shape != self.source.shape:
+            image = np.empty_like(self.source)
+        np.copyto(image, self.source)
+        return True, image
+
+
+def allocating_frame(cap, state):
+    ret, frame = cap.read()
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    mirror = cv2.flip(frame, 1)
+    return rgb, mirror
+
+
+def pooled_frame(cap, state):
+    pool, rgb_buffer, preview = state
+    buffer = pool.acquire(FRAME_SHAPE)
+    ret, frame = cap.read(buffer)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_buffer.get(frame.shape))
+    mirror = cv2.flip(frame, 1, dst=preview.get(frame.shape))
+    pool.release(frame)
+    return rgb, mirror
+
+
+def bench(name, fn, state, frames=500):
+    """Bytes allocated per frame (tracemalloc peak over each frame) and time per frame"""
+    cap = FakeCamera()
+    fn(cap, state)      # warm up (first frame fills the pool)
+
+    tracemalloc.start()
+    per_frame = []
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn(cap, state)
+        per_frame.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn(cap, state)
+    elapsed = (time.perf_counter() - start) / frames
+
+    print(f"{name:<12} {np.mean(per_frame) / 1e3:10.1f} kB allocated/frame (max {max(per_frame) / 1e3:.1f} kB)  "
+          f"{elapsed * 1e6:8.1f} us/frame")
+
+
+if __name__ == "__main__":
+    print(f"Frame {FRAME_SHAPE} = {np.prod(FRAME_SHAPE) / 1e3:.1f} kB")
+    bench("allocating", allocating_frame, None)
+    pool = FramePool()
+    bench("pooled", pooled_frame, (pool, ScratchBuffer(), ScratchBuffer()))
+    print(f"Frame pool: {pool.stats()}")
@@ -0,0 +1,102 @@
+'''
+Compares the hand inference backends (inference_backends.py) on recorded frames, to pick the fastest CPU path per device
+Every backend gets the same frames, fed as fast as it accepts them (live_stream keeps INFERENCE['in_flight'] queued):
+    throughput   frames completed per second
+    latency      submit -> landmarks per frame, p50 / p95
+    hands        share of completed frames with a hand found (sanity check that backends agree)
+    skipped      frames a live_stream backend dropped while busy
+Run from repo root: python benchmarks/bench_inference.py --session session.npz [--backends solutions:0 video ...]
+Record a session with frames first (SESSION['record_frames']) - without one, blank frames only exercise palm detection
+'''
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import cv2
+import numpy as np
+from config import FRAME_SIZE, INFERENCE
+from inference_backends import SolutionsBackend, TasksBackend, in_flight
+
+BACKENDS = ('solutions:0', 'solutions:1', 'video', 'live_stream')
+
+
+def load_frames(path, count):
+    """RGB frames from a recorded session, or blank frames when there is none"""
+    if path:
+        from session import Session
+        session = Session(path)
+        if session.has_frames:
+            return [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in session.frames[:count]]
+        print(f"{path} has no frames - using blank frames")
+    return [np.zeros((FRAME_SIZE['height'], FRAME_SIZE['width'], 3), dtype=np.uint8)] * count
+
+
+def create(spec, model):
+    name, _, complexity = spec.partition(':')
+    if name == 'solutions':
+        return name, SolutionsBackend(int(complexity or 1))
+    return name, TasksBackend(name, model=model)
+
+
+def run(spec, frames, model, fps=30):
+    """Feed every frame through one backend, returns (elapsed, latencies, hands found, skipped)"""
+    name, backend = create(spec, model)
+    slots = threading.Semaphore(in_flight(name))
+    latencies, found, skipped = [], [], []
+
+    def callback(submitted):
+        def done(hands_lm):
+            if hands_lm is None:
+                skipped.append(1)
+            else:
+                latencies.append(time.perf_counter() - submitted)
+                found.append(bool(hands_lm))
+            slots.release()
+        return done
+
+    # warm up on the first frame (model load is not part of the comparison)
+    warmed = threading.Event()
+    backend.submit(frames[0], 0.0, lambda hands_lm: warmed.set())
+    warmed.wait()
+
+    start = time.perf_counter()
+    for i, rgb in enumerate(frames, 1):
+        slots.acquire()
+        backend.submit(rgb, i / fps, callback(time.perf_counter()))
+    # wait for frames still in flight
+    for _ in range(in_flight(name)):
+        slots.acquire()
+    elapsed = time.perf_counter() - start
+    backend.close()
+    return elapsed, latencies, found, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare hand inference backends on recorded frames")
+    parser.add_argument('--session', help="recorded session (.npz with frames)")
+    parser.add_argument('--frames', type=int, default=300, help="number of frames to run through each backend")
+    parser.add_argument('--backends', nargs='+', default=BACKENDS,
+                        help="solutions:<complexity>, video, live_stream")
+    parser.add_argument('--model', default=INFERENCE['model'], help="HandLandmarker .task file for the tasks backends")
+    args = parser.parse_args()
+
+    frames = load_frames(args.session, args.frames)
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}, OpenCV threads {cv2.getNumThreads()}")
+    for spec in args.backends:
+        try:
+            elapsed, latencies, found, skipped = run(spec, frames, args.model)
+        except Exception as e:
+            print(f"{spec:<14} unavailable: {e}")
+            continue
+        ms = np.array(latencies) * 1000
+        print(f"{spec:<14} {len(latencies) / elapsed:8.1f} frames/s   latency p50 {np.percentile(ms, 50):7.2f}ms "
+              f"p95 {np.percentile(ms, 95):7.2f}ms   hands {np.mean(found):6.1%}   skipped {len(skipped)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+'''
+Throughput benchmark for the serial packet parser
+Compares the bulk PacketParser with the old 1-byte-at-a-time read + split loop, using an in-memory stream
+Run from repo root: python benchmarks/bench_serial_parser.py
+'''
+
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from protocol import PacketParser, Packet, Encoder, READ_SIZE
+
+BAUD_RATES = (115200, 921600, 12_000_000)       # USB serial gadget / fast UART / USB full speed
+
+
+def make_stream(n_packets, version=1, seed=0):
+    """Random mix of cursor, scroll and command frames (cursor most common, as in real use)"""
+    rng = random.Random(seed)
+    encoder = Encoder(version)
+    frames = []
+    for _ in range(n_packets):
+        r = rng.random()
+        if r < 0.8:
+            packet = Packet(b'R', rng.random(), rng.random(), timestamp=time.time())
+        elif r < 0.95:
+            packet = Packet(b'S', rng.random(), rng.random(), timestamp=time.time())
+        else:
+            packet = Packet(rng.choice([b'C', b'F', b'B', b'M']), timestamp=time.time())
+        frames.append(encoder.encode(packet))
+    return b''.join(frames), n_packets
+
+
+def legacy_parse(stream):
+    """Previous read_serial loop: 1 byte per read, immutable bytes buffer, split on newline"""
+    buffer = b''
+    frames = 0
+    for i in range(len(stream)):
+        buffer += stream[i:i + 1]
+        while b'\n' in buffer:
+            line, buffer = buffer.split(b'\n', 1)
+            if len(line) > 0:
+                frames += 1
+    return frames
+
+
+def bulk_parse(stream, read_size=READ_SIZE):
+    parser = PacketParser()
+    frames = 0
+    for i in range(0, len(stream), read_size):
+        frames += len(parser.feed(stream[i:i + read_size]))
+    return frames
+
+
+def bench(name, fn, stream, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = fn(stream)
+        best = min(best, time.perf_counter() - start)
+    rate = len(stream) / best
+    print(f"{name:<24} {frames:>8} frames  {rate / 1e6:8.2f} MB/s  {frames / best:12.0f} frames/s")
+    for baud in BAUD_RATES:
+        # 10 bits per byte on the wire (8N1)
+        line_rate = baud / 10
+        print(f"    {baud:>10} baud: line rate {line_rate:>9.0f} B/s -> parser CPU load {100 * line_rate / rate:6.2f}%")
+    return rate
+
+
+def bench_corrupt(stream):
+    """Corrupt 1% of bytes to check resync keeps up"""
+    rng = random.Random(1)
+    corrupt = bytearray(stream)
+    for i in rng.sample(range(len(corrupt)), len(corrupt) // 100):
+        corrupt[i] = rng.randrange(256)
+    parser = PacketParser()
+    parser.feed(bytes(corrupt))
+    print(f"Corrupted stream: {parser.stats()}")
+
+
+if __name__ == "__main__":
+    stream, n = make_stream(50_000, version=1)
+    print(f"Protocol v1 stream: {len(stream)} bytes, {n} packets")
+    # legacy frames count differs - packed coordinates containing 0x0A split its frames
+    bench("legacy (1 byte reads)", legacy_parse, stream)
+    bench("bulk PacketParser", bulk_parse, stream)
+    bench("bulk PacketParser (64B)", lambda s: bulk_parse(s, 64), stream)
+    bench_corrupt(stream)
+
+    stream, n = make_stream(50_000, version=2)
+    print(f"\nProtocol v2 stream: {len(stream)} bytes, {n} packets")
+    bench("bulk PacketParser", bulk_parse, stream)
+    bench_corrupt(stream)
@@ -0,0 +1,295 @@
+'''
+Micro-benchmarks for the tracking and control hot paths
+Reports ops/sec and per-call latency percentiles, saves baselines to JSON and fails when a hot path regresses
+Run from repo root:
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json --threshold 0.25
+'''
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from config import HAND_LANDMARKS, FRAME_SIZE, PARAMS
+from gestures import dist, gesture_features, gesture_packets, GestureStates, FEATURE_PAIRS
+from protocol import Packet, Encoder, PacketParser
+from bench_serial_parser import make_stream
+
+BENCHMARKS = {}
+
+# frames from a recorded session (--session), used by hands_process
+FIXTURE_FRAMES = []
+
+
+def benchmark(name):
+    """Register a setup function returning the callable to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class NullBackend:
+    """Input backend that does nothing, so only controller maths is timed"""
+    position = (0, 0)
+
+    def move(self, x, y):
+        pass
+
+
+def fixture_landmarks(seed=0):
+    """Plausible open-palm hand (normalised landmarks)"""
+    rng = np.random.default_rng(seed)
+    lm = np.zeros((21, 3), dtype=np.float32)
+    lm[:, 0] = 0.5 + 0.1 * np.cos(np.linspace(0, np.pi, 21))
+    lm[:, 1] = 0.7 - 0.3 * np.linspace(0, 1, 21)
+    lm[:, :2] += rng.normal(0, 0.01, (21, 2))
+    return lm
+
+
+@benchmark('dist_scalar_x10')
+def bench_dist():
+    lm = fixture_landmarks()
+    points = [types.SimpleNamespace(x=float(x), y=float(y)) for x, y, _ in lm]
+    pairs = [(points[HAND_LANDMARKS[a]], points[HAND_LANDMARKS[b]]) for _, a, b in FEATURE_PAIRS]
+    w, h = FRAME_SIZE['width'], FRAME_SIZE['height']
+
+    def run():
+        for a, b in pairs:
+            dist(a, b, w, h)
+    return run
+
+
+@benchmark('gesture_features')
+def bench_features():
+    lm = fixture_landmarks()
+    return lambda: gesture_features(lm)
+
+
+@benchmark('gesture_packets')
+def bench_cascade():
+    lm = fixture_landmarks()
+    return lambda: gesture_packets('R', lm, 0.0)
+
+
+@benchmark('gesture_packets_edge')
+def bench_cascade_edge():
+    lm = fixture_landmarks()
+    states = GestureStates()
+    return lambda: gesture_packets('R', lm, 0.0, states)
+
+
+def random_classifier(seed=0):
+    """Untrained classifier with the default layer sizes (inference cost doesn't depend on the weights)"""
+    from gesture_classifier import GestureClassifier, CLASSES, NUM_FEATURES
+    from config import CLASSIFIER
+    rng = np.random.default_rng(seed)
+    hidden = CLASSIFIER['hidden']
+    return GestureClassifier(rng.normal(0, 0.1, (NUM_FEATURES, hidden)).astype(np.float32),
+                             np.zeros(hidden, dtype=np.float32),
+                             rng.normal(0, 0.1, (hidden, len(CLASSES))).astype(np.float32),
+                             np.zeros(len(CLASSES), dtype=np.float32),
+                             np.zeros(NUM_FEATURES, dtype=np.float32), np.ones(NUM_FEATURES, dtype=np.float32))
+
+
+@benchmark('classifier_ratios')
+def bench_classifier():
+    lm = fixture_landmarks()
+    classifier = random_classifier()
+    return lambda: classifier.ratios(lm, 'R')
+
+
+@benchmark('cascade_ratios')
+def bench_cascade_ratios():
+    from gestures import cascade_ratios
+    lm = fixture_landmarks()
+    return lambda: cascade_ratios(lm)
+
+
+@benchmark('encode_v1')
+def bench_encode_v1():
+    encoder = Encoder(1)
+    packet = Packet(b'R', 0.4, 0.6)
+    return lambda: encoder.encode(packet)
+
+
+@benchmark('encode_v2')
+def bench_encode_v2():
+    encoder = Encoder(2)
+    packet = Packet(b'R', 0.4, 0.6, timestamp=1.0)
+    return lambda: encoder.encode(packet)
+
+
+@benchmark('parse_v2_4k_chunk')
+def bench_parse():
+    stream, _ = make_stream(2000, version=2)
+    chunk = stream[:4096 - 4096 % 19]
+    parser = PacketParser()
+    return lambda: parser.feed(chunk)
+
+
+@benchmark('map_to_screen')
+def bench_map():
+    import control_machine
+    control_machine.init_screen_map()
+    loc = [0.43, 0.57]
+    return lambda: control_machine.map_to_screen(loc)
+
+
+@benchmark('velocity_step')
+def bench_velocity_step():
+    import control_machine
+    return lambda: control_machine.velocity_step([100.0, 100.0], [900.0, 500.0])
+
+
+@benchmark('velocity_scale_interpolate')
+def bench_velocity_scale():
+    # blocking reference path with a no-op mouse and no sleep between steps
+    import control_machine
+    control_machine.backend = NullBackend()
+    interpolate = control_machine.interpolate
+    control_machine.interpolate = lambda start, end: interpolate(start, end, delay=0)
+    return lambda: control_machine.velocity_scale([100.0, 100.0], [900.0, 500.0])
+
+
+@benchmark('uinput_move_fake')
+def bench_uinput_move():
+    # event group encoding + write for one cursor move, into an in-memory device
+    from input_backend import create_backend
+    backend = create_backend('uinput_fake')
+    backend.pointer.write = lambda data: None
+    return lambda: backend.move(640, 360)
+
+
+@benchmark('cvtColor')
+def bench_cvtcolor():
+    import cv2
+    frame = np.random.default_rng(0).integers(0, 255, (FRAME_SIZE['height'], FRAME_SIZE['width'], 3), dtype=np.uint8)
+    return lambda: cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+@benchmark('hands_process')
+def bench_hands():
+    # legacy solution - benchmarks/bench_inference.py compares every backend
+    import cv2
+    from inference_backends import create_backend
+    backend = create_backend('solutions')
+    frames = FIXTURE_FRAMES or [np.zeros((FRAME_SIZE['height'], FRAME_SIZE['width'], 3), dtype=np.uint8)]
+    rgb = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+    index = [0]
+
+    def run():
+        backend.process(rgb[index[0] % len(rgb)], index[0] / 30)
+        index[0] += 1
+    return run
+
+
+def measure(fn, duration, batch=None):
+    """Time fn in batches for roughly duration seconds, returns ops/sec and per-call latency percentiles (us)"""
+    # calibrate batch size so each timed batch takes ~1ms
+    if batch is None:
+        batch = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(batch):
+                fn()
+            if time.perf_counter() - start > 1e-3 or batch >= 1 << 16:
+                break
+            batch *= 2
+
+    samples = []
+    calls = 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        samples.append((time.perf_counter() - start) / batch)
+        calls += batch
+
+    samples = np.array(samples) * 1e6
+    return {
+        'ops_per_sec': round(1e6 / samples.mean(), 1),
+        'p50_us': round(float(np.percentile(samples, 50)), 3),
+        'p95_us': round(float(np.percentile(samples, 95)), 3),
+        'p99_us': round(float(np.percentile(samples, 99)), 3),
+        'calls': calls,
+    }
+
+
+def run_all(selected, duration):
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if selected and not any(s in name for s in selected):
+            continue
+        try:
+            fn = setup()
+        except ImportError as e:
+            print(f"{name:<28} skipped ({e})")
+            continue
+        fn()        # warm up
+        results[name] = stats = measure(fn, duration)
+        print(f"{name:<28} {stats['ops_per_sec']:>14,.0f} ops/s   p50 {stats['p50_us']:>10.2f}us   "
+              f"p95 {stats['p95_us']:>10.2f}us   p99 {stats['p99_us']:>10.2f}us")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return names of benchmarks whose p50 latency got slower than baseline by more than threshold"""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        change = stats['p50_us'] / base['p50_us'] - 1
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:<28} p50 {base['p50_us']:>10.2f}us -> {stats['p50_us']:>10.2f}us ({change:+.1%}) {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tracking and control hot paths")
+    parser.add_argument('names', nargs='*', help="only run benchmarks whose name contains one of these")
+    parser.add_argument('--duration', type=float, default=1.0, help="seconds per benchmark")
+    parser.add_argument('--session', help="recorded session (.npz with frames) to use as fixture frames")
+    parser.add_argument('--save', help="write results to this baseline JSON")
+    parser.add_argument('--compare', help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed p50 slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    if args.session:
+        from session import Session
+        session = Session(args.session)
+        if session.has_frames:
+            FIXTURE_FRAMES.extend(session.frames[:100])
+
+    print(f"Python {platform.python_version()} on {platform.machine()} | FRAME_SIZE {FRAME_SIZE} | PARAMS {PARAMS}")
+    results = run_all(args.names, args.duration)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'machine': platform.machine(), 'python': platform.python_version(),
+                       'frame_size': FRAME_SIZE, 'results': results}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"FAILED: {len(regressions)} hot path(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+'''
+Bounded asyncio channels for handing data between pipeline stages
+When a consumer falls behind, the overflow policy decides what gets dropped so stages always work on fresh data:
+    drop_oldest = ring buffer, evict the oldest item to make room for the new one
+    keep_latest = discard everything still waiting and keep only the new item
+    block       = wait for space (same behaviour as a bounded asyncio.Queue)
+PacketQueue is the controller-side equivalent: movement packets coalesce and commands never wait behind newer movement
+'''
+
+import asyncio
+import time
+from collections import deque
+
+POLICIES = ('drop_oldest', 'keep_latest', 'block')
+
+
+class LatestChannel:
+    """Bounded queue with a configurable overflow policy and a count of dropped items"""
+
+    def __init__(self, maxsize=1, policy='keep_latest', name="channel", on_drop=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.name = name
+        self.on_drop = on_drop      # called with each discarded item (e.g. to return frame buffers to a pool)
+        self.dropped = 0            # items discarded because the consumer fell behind
+        self.put_count = 0
+        self._items = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def full(self):
+        return len(self._items) >= self.maxsize
+
+    def put_nowait(self, item):
+        """Add item without waiting, dropping stale items if full (raises asyncio.QueueFull with policy = block)"""
+        if self.full():
+            if self.policy == 'block':
+                raise asyncio.QueueFull
+            elif self.policy == 'keep_latest':
+                self.dropped += len(self._items)
+                if self.on_drop is not None:
+                    for stale in self._items:
+                        self.on_drop(stale)
+                self._items.clear()
+            else:
+                stale = self._items.popleft()
+                self.dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(stale)
+
+        self._items.append(item)
+        self.put_count += 1
+        self._not_empty.set()
+        if self.full():
+            self._not_full.clear()
+
+    async def put(self, item):
+        """Add item, only waiting for space when policy = block"""
+        while self.policy == 'block' and self.full():
+            await self._not_full.wait()
+        self.put_nowait(item)
+
+    def get_nowait(self):
+        if not self._items:
+            raise asyncio.QueueEmpty
+        item = self._items.popleft()
+        if not self._items:
+            self._not_empty.clear()
+        self._not_full.set()
+        return item
+
+    async def get(self):
+        """Wait for and return the oldest item still held"""
+        while not self._items:
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def stats(self):
+        return {'name': self.name, 'put': self.put_count, 'dropped': self.dropped, 'size': len(self._items)}
+
+
+class PacketQueue:
+    """
+    Controller input queue with command priority and coalescing of movement packets
+    Only the latest cursor (R / L) and scroll (S) packet is kept - older ones are counted as coalesced
+    Commands (C, E, F, B, M) keep their order and jump ahead of movement from later frames, but movement pending from
+    their own frame or earlier is delivered first, so a click lands where the cursor was when it was made
+    """
+
+    COALESCE = {b'R': 'cursor', b'L': 'cursor', b'S': 'scroll'}
+
+    def __init__(self):
+        self.coalesced = 0          # movement packets replaced by a newer one before being processed
+        self.put_count = 0
+        self._commands = deque()    # commands, plus the movement that has to be delivered before them
+        self._latest = {}           # coalescing key -> newest packet, in arrival order
+        self._not_empty = asyncio.Event()
+        self.last_wait = 0.0        # seconds the last packet returned by get spent queued
+
+    def qsize(self):
+        return len(self._commands) + len(self._latest)
+
+    def empty(self):
+        return not self._commands and not self._latest
+
+    def put_nowait(self, packet):
+        key = self.COALESCE.get(packet.kind)
+        item = (time.perf_counter(), packet)
+        if key is None:
+            # flush movement captured no later than the command (all of it when timestamps are unknown)
+            for flushed in [pending for pending, (_, moved) in self._latest.items()
+                            if moved.timestamp is None or packet.timestamp is None
+                            or moved.timestamp <= packet.timestamp]:
+                self._commands.append(self._latest.pop(flushed))
+            self._commands.append(item)
+        else:
+            # re-insert so ordering between cursor and scroll follows the newest arrival
+            if self._latest.pop(key, None) is not None:
+                self.coalesced += 1
+            self._latest[key] = item
+        self.put_count += 1
+        self._not_empty.set()
+
+    async def put(self, packet):
+        self.put_nowait(packet)
+
+    def get_nowait(self):
+        if self._commands:
+            queued, packet = self._commands.popleft()
+        elif self._latest:
+            queued, packet = self._latest.pop(next(iter(self._latest)))
+        else:
+            raise asyncio.QueueEmpty
+        if self.empty():
+            self._not_empty.clear()
+        self.last_wait = time.perf_counter() - queued
+        return packet
+
+    async def get(self):
+        """Wait for the next packet - commands (and movement flushed ahead of them) first, then the latest movement"""
+        while self.empty():
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def stats(self):
+        return {'put': self.put_count, 'coalesced': self.coalesced, 'size': self.qsize()}
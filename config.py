@@ -4,7 +4,9 @@ PARAMS = {
     'DAMP': 100,               # higher = more stability when holding still (was 60)
     'SENSITIVITY': 15,         # higher = larger "stable" region (was 5)
     'STEPS': 20,               # keep this the same for smooth movement
-    'DELAY': 0.0001            # lower = faster response (was 0.0002)
+    'DELAY': 0.0001,           # lower = faster response (was 0.0002)
+    'RATE': 500,               # cursor motion engine output rate (Hz)
+    'GLIDE': 0.016             # seconds to glide to each new position (~1 camera frame)
 }
 
 # mediapipe landmarks
@@ -20,4 +22,150 @@ HAND_LANDMARKS = {
 }
 
 # define virtual frame size in pixels (480x270 is a good tradeoff between resolution and processing speed)
-FRAME_SIZE = {'width': 480, 'height': 270}
\ No newline at end of file
+FRAME_SIZE = {'width': 480, 'height': 270}
+
+# bounded queues between tracking stages (policy = drop_oldest / keep_latest / block)
+# keep_latest with maxsize 1 means each stage always works on the freshest frame - stale frames are skipped
+QUEUES = {
+    'frame': {'maxsize': 1, 'policy': 'keep_latest'},        # capture -> inference
+    'landmark': {'maxsize': 1, 'policy': 'keep_latest'},     # inference -> send
+}
+
+# hand inference off the event loop (see inference.py / inference_backends.py)
+INFERENCE = {
+    'backend': 'solutions',         # solutions (legacy Hands) / video / live_stream (MediaPipe Tasks, need 'model')
+    'model': 'hand_landmarker.task',
+    'workers': 1,                   # inference threads - keep at 1 unless inference is the bottleneck
+    'max_hands': 1,
+    'in_flight': 2,                 # frames each live_stream worker keeps queued in mediapipe
+    'cv_threads': None,             # OpenCV threads (None = default)
+}
+
+# multi-process pipeline for serial mode (capture / inference / gesture+transmit in separate processes)
+# frames are passed through a ring of 'ring_slots' shared memory buffers of FRAME_SIZE
+PIPELINE = {'processes': False, 'ring_slots': 4, 'report_every': 1.0}
+
+# serial wire protocol (see protocol.py) - version 2 adds sequence numbers, capture timestamps, CRC and 16 bit coordinates
+# tracker offers 'version' on every connect, falls back to 1 without a reply (UDP re-offers every 'hello_interval' s)
+PROTOCOL = {'version': 2, 'hello_timeout': 1.0, 'hello_interval': 1.0}
+
+# latency tracing (see tracing.py) - rolling p50 / p95 / p99 per stage over the last 'window' samples
+# every 'report_every' seconds stats are dumped to 'dump_path' ({role} = tracker / controller) and optionally printed
+TRACE = {'enabled': True, 'window': 1000, 'report_every': 5.0, 'print': False, 'dump_path': 'latency_{role}.json'}
+
+# mouse / keyboard backend for control_machine.py (see input_backend.py)
+# pynput = real input, uinput = Linux virtual devices (lowest latency, needs write access to /dev/uinput),
+# uinput_fake = uinput encoding into memory, recording = fake that logs events
+# default_screen is used when no monitor can be found (e.g. headless replay)
+# stats = record per action injection time as tracer spans (inject_move, inject_click, inject_scroll, inject_hotkey)
+INPUT = {'backend': 'pynput', 'default_screen': (1920, 1080), 'stats': True}
+
+# hand position -> screen mapping for control_machine.py (see screen_map.py)
+# region = active part of the camera frame (x0, y0, x1, y1) - outside it the cursor is pinned to the screen edge
+# monitors = 'all' (spread across the hand's range, sized by physical width) or 'primary'
+# dpi = per monitor overrides by name (e.g. {'DP-1': 163}) when a monitor doesn't report its size, else default_dpi
+# resolution = lookup table entries per axis, poll = seconds between display layout checks (0 = never)
+MAPPING = {'region': (0.2, 0.2, 0.8, 0.8), 'monitors': 'all', 'dpi': {}, 'default_dpi': 96, 'resolution': 16384,
+           'poll': 2.0}
+
+# session recording / replay (see session.py and replay.py)
+# record_path = .npz file to record landmarks to (+ raw frames if record_frames) while running hand_tracking_v2.py
+# source = recorded session to use as camera instead of the webcam (None = webcam)
+SESSION = {'record_path': None, 'record_frames': False, 'source': None}
+
+# region of interest cropping before inference (see roi.py) - crop = previous hand box + margin (fraction of box size)
+# growing by motion_gain per box-size of movement per frame, never smaller than min_size of the frame
+# worth enabling when FRAME_SIZE is raised for precision - full frame is used whenever the hand is lost
+# not supported with INFERENCE['backend'] = 'live_stream'
+ROI = {'enabled': False, 'margin': 0.5, 'motion_gain': 2.0, 'min_size': 0.3}
+
+# adaptive quality governor (see governor.py) - levels go from best quality to cheapest
+# steps down when p95 capture -> landmark latency exceeds budget_ms or fps drops below target,
+# steps back up when p95 is under headroom * budget, re-evaluated every 'interval' seconds
+GOVERNOR = {
+    'enabled': True,
+    'budget_ms': 40,
+    'target_fps': 30,
+    'headroom': 0.5,
+    'interval': 2.0,
+    'start_level': 1,
+    'levels': [
+        {'width': 640, 'height': 360, 'stride': 1, 'complexity': 1},
+        {'width': 480, 'height': 270, 'stride': 1, 'complexity': 1},
+        {'width': 480, 'height': 270, 'stride': 1, 'complexity': 0},
+        {'width': 320, 'height': 180, 'stride': 1, 'complexity': 0},
+        {'width': 320, 'height': 180, 'stride': 2, 'complexity': 0},
+    ],
+}
+
+# cursor / scroll trajectory filter in control_machine.py (see filters.py) - type = one_euro / kalman / none
+# predict_ms extrapolates the filtered position ahead to cancel pipeline latency
+# filter is reset after reset_after seconds without a packet (or when switching between cursor and scroll)
+FILTER = {
+    'type': 'one_euro',
+    'predict_ms': 20,
+    'reset_after': 0.5,
+    'min_cutoff': 1.0,              # one_euro
+    'beta': 20.0,                   # one_euro
+    'd_cutoff': 1.0,                # one_euro
+    'process_noise': 25.0,          # kalman
+    'measurement_noise': 4e-6,      # kalman
+}
+
+# motion gate in hand_tracking_v2.py (see motion_gate.py) - skips mediapipe while the scene is static
+MOTION = {
+    'enabled': True,
+    'size': (64, 36),               # thumbnail size frames are compared at
+    'pixel_threshold': 20,          # pixel change that counts as motion
+    'min_area': 0.003,              # fraction of pixels that must change
+    'refresh': 1.0,                 # seconds between inference on static frames
+    'armed_refresh': 0.03,          # same while a command gesture is mid-hold (a held pose doesn't move)
+    'idle_after': 10.0,             # seconds without a hand before capture drops to idle_fps / idle_size
+    'idle_fps': 10,
+    'idle_size': {'width': 320, 'height': 180},
+}
+
+# reused frame buffers for capture (see framepool.py) - spare frames kept per resolution
+# frames in flight = capture + frame queue + 2 per inference worker, so keep capacity above that
+FRAME_POOL = {'capacity': 8}
+
+# camera preview (see preview.py) - mode = auto / window / mjpeg / headless
+# auto shows a window in async mode and runs headless in serial mode (remote camera, e.g. Raspberry Pi)
+PREVIEW = {'mode': 'auto', 'fps': 10, 'landmarks': True, 'port': 8080, 'quality': 70}
+
+# command gestures are edge triggered (see GestureStates in gestures.py) - one packet per gesture, not per frame
+# a gesture fires once its condition has held for 'hold' seconds, and re-arms after it has been released for
+# 'release' seconds. 'exit' loosens the threshold once engaged (hysteresis), e.g. 1.3 = pinch must open 30% wider
+GESTURES = {
+    'exit': 1.3,
+    'release': 0.1,
+    'hold': {'C': 0.0, 'E': 0.3, 'F': 0.1, 'B': 0.1, 'M': 0.2},
+}
+
+# learned gesture classifier (see gesture_classifier.py / train_classifier.py) - model = path to a trained .npz,
+# None uses the hand written distance cascade. Commands need min_confidence class probability to engage
+CLASSIFIER = {'model': None, 'min_confidence': 0.6, 'hidden': 32}
+
+# link between tracker and control_machine.py on separate machines (see transport.py)
+TRANSPORT = {
+    'type': 'serial',                                   # serial / udp / tcp / hybrid - the same on both machines
+    'serial_port': '/dev/ttyGS0',                       # tracker side (USB gadget on the Pi)
+    'controller_serial_port': '/dev/tty.usbmodem14101', # controller side
+    'baudrate': 115200,
+    'host': '127.0.0.1',        # controller address the tracker sends to
+    'bind': '0.0.0.0',          # address the controller listens on
+    'udp_port': 5005,
+    'tcp_port': 5006,
+    'reconnect_delay': 1.0,     # seconds between TCP reconnect attempts
+    'backlog': 32,              # commands kept while TCP is down
+    'max_pending': 16384,       # unsent TCP bytes before the link counts as stalled (movement dropped, commands kept)
+}
+
+# startup (see startup_profile.py)
+STARTUP = {
+    'mouse_test': False,            # move the real cursor and back at launch
+    'warmup': True,                 # run each mediapipe graph on a blank frame while the camera opens
+    'warmup_timeout': 10.0,         # seconds to wait for the warm-up result
+    'profile': True,                # print time to first gesture by phase, dump it to profile_path
+    'profile_path': 'startup_{role}.json',      # {role} = main / tracker / controller
+}
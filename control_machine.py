@@ -1,36 +1,64 @@
 '''
-Translates data from serial into mouse and keyboard actions
+Translates data from serial (or UDP / TCP, see transport.py) into mouse and keyboard actions
 3 categories: cursor movement, scroll, commands
 Call script directly only when processing camera feed on a separate machine (e.g. Raspberry Pi)
 '''
 
-from pynput.mouse import Controller as MouseController, Button
-from pynput.keyboard import Controller as KeyboardController, Key
-import keyboard
-import pyautogui
-from screeninfo import get_monitors
-from collections import deque
 import asyncio
 import time
 import sys
-import struct
-from config import PARAMS
+from config import PARAMS, INPUT, FILTER, STARTUP
+from input_backend import create_backend
+from channels import PacketQueue
+from protocol import COMMAND_KINDS
+from tracing import tracer
+from transport import open_receivers, close_receivers
+from filters import create_filter
+from screen_map import ScreenMap
+from startup_profile import profiler
 
 # define RUN_MODE
 RUN_MODE = "serial" if __name__ == "__main__" else "async"
 
-# Initialize
-mouse = MouseController()
-pykeyboard = KeyboardController()
-monitors = get_monitors()
-primary_monitor = monitors[0]
-SCREEN_WIDTH = primary_monitor.width
-SCREEN_HEIGHT = primary_monitor.height
+# name of this process in the startup profile (startup_<role>.json)
+PROFILE_ROLE = "controller" if RUN_MODE == "serial" else "main"
 
-# Smoothing buffers for moving average
-buffer_size = 3
-x_buffer = deque(maxlen=buffer_size)
-y_buffer = deque(maxlen=buffer_size)
+# mouse / keyboard backend (created in main via init_backend, or swapped for a RecordingBackend)
+backend = None
+
+
+def init_backend(name=INPUT['backend']):
+    """Create the input backend if not already set"""
+    global backend
+    desktop = init_screen_map().desktop
+    if backend is None:
+        with profiler.phase('input_backend'):
+            backend = create_backend(name, desktop, timed=INPUT['stats'])
+    return backend
+
+
+def init_screen_map():
+    """Read the monitor layout and build the screen mapping tables if not already done"""
+    global screen_map
+    if screen_map is None:
+        with profiler.phase('screen_map'):
+            screen_map = ScreenMap()
+    return screen_map
+
+
+def layout_changed(new_map):
+    """Display layout changed (see ScreenMap.watch) - tell backends that address the desktop directly"""
+    if hasattr(backend, 'set_desktop'):
+        backend.set_desktop(*new_map.desktop)
+
+
+# lookup tables from hand position to desktop pixels across all monitors (see screen_map.py) - built by init_backend
+screen_map = None
+
+# trajectory filters for MOVE_ID (cursor) and INDEX_TIP (scroll), see filters.py
+cursor_filter = create_filter()
+scroll_filter = create_filter()
+last_filtered = None        # (filter, capture time) of last filtered packet
 
 # initialise mouse clicks / position
 last_click = 0
@@ -46,21 +74,11 @@ class StopException(Exception):
     pass
 
 def map_to_screen(loc):
-    """Map integer coordinates received over serial (in range 0->1000) to screen coordinates"""
-    def zoom(value, screen_size):
-        if value < 200:
-            return 0
-        elif value > 800:
-            return screen_size
-        else:
-            return int(((value - 200) / 600) * screen_size)
-
-    screen_x = int(zoom(loc[0], SCREEN_WIDTH))
-    screen_y = int(zoom(loc[1], SCREEN_HEIGHT))
-    return [screen_x, screen_y]
+    """Map normalised coordinates (in range 0->1) to desktop pixels (table lookup, see screen_map.py)"""
+    return screen_map.lookup(loc[0], loc[1])
 
-def velocity_scale(cur, tar, GAIN=PARAMS['GAIN'], DAMP=PARAMS['DAMP'], SENSITIVITY=PARAMS['SENSITIVITY'], MIN_STEP=1):
-    """Adjust speed of cursor based on distance"""
+def velocity_step(cur, tar, GAIN=PARAMS['GAIN'], DAMP=PARAMS['DAMP'], SENSITIVITY=PARAMS['SENSITIVITY'], MIN_STEP=1):
+    """Calculate next cursor position towards target, scaled by distance. Returns (new position, distance)"""
     # calculate Euclidian distance
     distance = ((tar[0] - cur[0]) ** 2 + (tar[1] - cur[1]) ** 2) ** 0.5
 
@@ -79,16 +97,73 @@ def velocity_scale(cur, tar, GAIN=PARAMS['GAIN'], DAMP=PARAMS['DAMP'], SENSITIVI
     dy = (tar[1] - cur[1]) / scaling_factor
 
     # calculate new positions
-    new = [cur[0] + dx, cur[1] + dy]
+    return [cur[0] + dx, cur[1] + dy], distance
+
+def velocity_scale(cur, tar, SENSITIVITY=PARAMS['SENSITIVITY'], **kwargs):
+    """Adjust speed of cursor based on distance (blocking - the event loop uses CursorMotion instead)"""
+    new, distance = velocity_step(cur, tar, SENSITIVITY=SENSITIVITY, **kwargs)
 
     # Move cursor
     if distance > SENSITIVITY:
         interpolate(cur, new)
     else:
-        mouse.position = (int(new[0]), int(new[1]))
+        backend.move(int(new[0]), int(new[1]))
 
     return new
 
+class CursorMotion:
+    """
+    Cursor motion engine running as its own timed task at PARAMS['RATE'] Hz
+    Each new target retargets the glide mid-flight, so packets never wait for the previous movement to finish
+    """
+
+    def __init__(self, rate=PARAMS['RATE'], glide=PARAMS['GLIDE'], SENSITIVITY=PARAMS['SENSITIVITY'], immediate=False):
+        self.interval = 1.0 / rate
+        self.glide_steps = max(1, round(glide * rate))     # ticks used to glide to each new position
+        self.sensitivity = SENSITIVITY
+        self.immediate = immediate      # jump straight to each new position (replay - no timed task)
+        self.pos = None         # position the engine last wrote
+        self.step = (0.0, 0.0)
+        self.remaining = 0
+
+    def retarget(self, tar):
+        """Velocity scale from the current (possibly mid-glide) position towards new screen target"""
+        cur = self.pos if self.pos is not None else list(backend.position)
+        new, distance = velocity_step(cur, tar, SENSITIVITY=self.sensitivity)
+
+        if distance > self.sensitivity and not self.immediate:
+            # glide over several ticks to fill the visual gaps of the cursor
+            self.step = ((new[0] - cur[0]) / self.glide_steps, (new[1] - cur[1]) / self.glide_steps)
+            self.remaining = self.glide_steps
+        else:
+            # small movement - jump straight there
+            self.remaining = 0
+            self._move(new)
+
+        return new
+
+    def _move(self, new):
+        if self.pos is None or int(new[0]) != int(self.pos[0]) or int(new[1]) != int(self.pos[1]):
+            backend.move(int(new[0]), int(new[1]))
+        self.pos = new
+
+    async def run(self):
+        """Advance the cursor one step per tick while a glide is in progress"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+
+        while True:
+            if self.remaining:
+                self.remaining -= 1
+                self._move([self.pos[0] + self.step[0], self.pos[1] + self.step[1]])
+
+            # schedule against absolute tick times so the output rate doesn't drift
+            next_tick = max(next_tick + self.interval, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+# cursor motion engine (run as a task in main)
+motion = CursorMotion()
+
 def lerp(start, end, factor):
     """Linear interpolation between start (current) and end (target) points"""
     return start + (end - start) * factor
@@ -104,123 +179,103 @@ def interpolate(start, end, steps=PARAMS['STEPS'], delay=PARAMS['DELAY']):
         interp_y = lerp(start[1], end[1], i / steps)
 
         # Move the mouse to the interpolated position
-        mouse.position = (int(interp_x), int(interp_y))
+        backend.move(int(interp_x), int(interp_y))
 
         # Small delay to ensure smooth visual movement
         time.sleep(delay)
 
-async def read_serial(serial_reader, data_queue):
-    """
-    Read data asynchronously from the serial port
-    Protocol =
-    2 bytes for command (1 char + newline)
-    6 bytes for scroll (1 char + 2 int + newline)
-    6 bytes for cursor movement (1 char + 2 int + newline)
-    """
-    buffer = b''  # store packets as they come in
-
-    while True:
-        start_read = time.time()
-
-        try:
-            # read 1 byte of data and immediately append to buffer
-            chunk = await serial_reader.read(1)
-            if not chunk:
-                continue  # Skip if no data is received
+def trace_packet(packet, dequeued, injected):
+    """Record dispatch + injection spans for one packet, plus end-to-end latency when it has a capture timestamp"""
+    done = time.perf_counter()
+    tracer.record('dispatch', injected - dequeued)
+    tracer.record('injection', done - injected)
+    if packet.timestamp is not None:
+        tracer.record('end_to_end', time.time() - packet.timestamp)
+    profiler.milestone('first_injection', role=PROFILE_ROLE)
 
-            buffer += chunk
 
-            # Process complete packets (ending with newline)
-            while b'\n' in buffer:
-                line, buffer = buffer.split(b'\n', 1)  # Split at the first newline
-                if len(line) > 0:
-                    await data_queue.put(line)  # Queue the complete packet
+def filter_point(trajectory, x, y, t, predict=0.0):
+    """Filter a normalised point at capture time t, optionally extrapolated predict seconds ahead"""
+    global last_filtered
 
-                    end_read = time.time()
-                    # print(f"Time to process 1 packet: {end_read - start_read:.6f} seconds")
+    # start afresh after a gap, or when switching between cursor and scroll
+    if last_filtered is None or last_filtered[0] is not trajectory or t - last_filtered[1] > FILTER['reset_after']:
+        trajectory.reset()
+    last_filtered = (trajectory, t)
 
-        except Exception as e:
-            print(f"Error reading serial data: {e}")
-            break
+    x, y = trajectory(x, y, t)
+    if predict:
+        x, y = trajectory.predict(predict)
+    return min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
 
 
 async def process_data(data_queue, cur):
-    """Process serial data and perform cursor actions"""
+    """Process packets (see protocol.py) and perform cursor actions"""
     global last_click, scroll_anchor
 
     while True:
         try:
             # Get the next packet from the queue
-            data = await data_queue.get()
-
-            # Handle command packets (length 2 - includes newline character)
-            if len(data) == 2:
-                command = data[0:1]  # Get just the command byte
+            packet = await data_queue.get()
+            dequeued = time.perf_counter()
+            if isinstance(data_queue, PacketQueue):
+                tracer.record('queue_wait', data_queue.last_wait)
+            command = packet.kind
+
+            # Handle command packets
+            if command in COMMAND_KINDS:
+                injected = time.perf_counter()
                 if command == b'C':
-                    current_time = time.time()
+                    # cooldown in capture time when known (keeps replays deterministic)
+                    current_time = packet.timestamp if packet.timestamp is not None else time.time()
                     if current_time - last_click > cooldown:
-                        mouse.click(Button.left)
+                        backend.click()
                         last_click = current_time
                 elif command == b'E':
                     raise StopException()
                 elif command == b'F':
-                    with pykeyboard.pressed(Key.ctrl):
-                        pykeyboard.press(Key.tab)
-                        pykeyboard.release(Key.tab)
+                    backend.hotkey('ctrl', 'tab')
                 elif command == b'B':
-                    with pykeyboard.pressed(Key.ctrl):
-                        with pykeyboard.pressed(Key.shift):
-                            pykeyboard.press(Key.tab)
-                            pykeyboard.release(Key.tab)
+                    backend.hotkey('ctrl', 'shift', 'tab')
                 elif command == b'M':
-                    pyautogui.keyDown("ctrl")
-                    pyautogui.press("up")
-                    pyautogui.keyUp("ctrl")
+                    backend.mission_control()
+                trace_packet(packet, dequeued, injected)
                 continue
 
-            # Handle movement packets (length 6 - includes newline character)
-            if len(data) == 6:
-                try:
-                    command = data[0:1]
+            # Handle movement packets (coordinates normalised to 0->1)
+            try:
+                # filters run on capture time when known (keeps replays deterministic)
+                t = packet.timestamp if packet.timestamp is not None else time.time()
 
-                    if command == b'S':
-                        # Unpack binary data (ignore newline)
-                        _, scroll_loc, anchor_loc = struct.unpack('=c2H', data[:-1])
-                        
-                        # Flip y-axis
-                        scroll_loc = 1000 - int(scroll_loc)
-                        anchor_loc = 1000 - int(anchor_loc)
+                if command == b'S':
+                    # Flip y-axis
+                    scroll_loc, anchor_loc = filter_point(scroll_filter, 1.0 - packet.a, 1.0 - packet.b, t)
 
-                        # set scroll anchor (relative to hand position)
-                        if scroll_anchor is None:
-                            scroll_anchor = anchor_loc
+                    # set scroll anchor (relative to hand position)
+                    if scroll_anchor is None:
+                        scroll_anchor = anchor_loc
 
-                        scroll_y = int((scroll_anchor - scroll_loc) / 10)
-                        mouse.scroll(dx=0, dy=scroll_y)
+                    scroll_y = int((scroll_anchor - scroll_loc) * 100)
+                    injected = time.perf_counter()
+                    backend.scroll(scroll_y)
+                    trace_packet(packet, dequeued, injected)
 
-                    elif command in [b'R', b'L']:
-                        scroll_anchor = None
+                elif command in [b'R', b'L']:
+                    scroll_anchor = None
 
-                        # Unpack binary data (ignore newline)
-                        hand_label, x_loc, y_loc = struct.unpack('=c2H', data[:-1])
+                    # Flip y-axis, smooth and extrapolate ahead to cancel pipeline latency
+                    loc = filter_point(cursor_filter, packet.a, 1.0 - packet.b, t, FILTER['predict_ms'] / 1000)
 
-                        # Flip y-axis
-                        loc = [int(x_loc), 1000 - int(y_loc)]
+                    # Convert to screen coordinates
+                    tar = map_to_screen(loc)
 
-                        # Convert to screen coordinates
-                        tar = map_to_screen(loc)
+                    # Retarget the motion engine (cursor moves on its own timed task)
+                    injected = time.perf_counter()
+                    cur = motion.retarget(tar)
+                    trace_packet(packet, dequeued, injected)
 
-                        # Get current mouse position
-                        cur_pos = list(mouse.position)
-
-                        # Move cursor with velocity scaling
-                        new_pos = velocity_scale(cur_pos, tar)
-                        
-                        # Update current position
-                        cur = new_pos
-
-                except Exception as e:
-                    print(f"Error processing movement data: {e}")
+            except Exception as e:
+                print(f"Error processing movement data: {e}")
 
         except StopException:
             break
@@ -232,53 +287,78 @@ async def main(data_queue=None):
     """Main event loop"""
 
     print("Listening for data from Hand Tracking script...")
+    profiler.milestone('controller_main')
+    # monitor query + input library import off the event loop, so the tracker keeps starting up meanwhile
+    await asyncio.to_thread(init_backend)
 
     # set initial cur_x, cur_y
     cur = [0,0]
 
+    tracer.start_reporter("controller")
+
+    # rebuild the screen mapping when monitors are plugged / unplugged
+    layout_task = asyncio.create_task(screen_map.watch(layout_changed))
+
     # get data_queue from hand_tracking script if in async mode
     if RUN_MODE == "async" and data_queue is not None:
+        motion_task = asyncio.create_task(motion.run())
         try:
             await process_data(data_queue, cur)
+        finally:
+            motion_task.cancel()
 
-        except StopException:
-            # if "stop" received, shut down program gracefully
-            print("PROGRAM ENDED")
+        # "stop" received, shut down program gracefully
+        print("PROGRAM ENDED")
+        if isinstance(data_queue, PacketQueue):
+            print(f"Packets received: {data_queue.put_count}, coalesced: {data_queue.coalesced}")
 
-    # initialize data_queue if in serial mode
+    # receive packets from a tracker on another machine (serial / UDP / TCP, see transport.py)
     elif RUN_MODE == "serial":
-        import serial_asyncio
-        serial_port = await serial_asyncio.open_serial_connection(url='/dev/tty.usbmodem14101', baudrate=115200)
-        reader, writer = serial_port
-
-        data_queue = asyncio.Queue()
+        # commands jump ahead, cursor / scroll packets coalesce to the latest sample
+        data_queue = PacketQueue()
+        links = await open_receivers(data_queue)
 
+        # move cursor in the background while processing data
+        motion_task = asyncio.create_task(motion.run())
         try:
-            # create and run tasks for reading and processing data
-            async with asyncio.TaskGroup() as tg:
-                tg.create_task(read_serial(reader, data_queue))
-                tg.create_task(process_data(data_queue, cur))
-
-        except StopException:
-            # if "stop" received, shut down program gracefully
-            print("PROGRAM ENDED")
+            await process_data(data_queue, cur)
+        finally:
+            motion_task.cancel()
+            close_receivers(links)
+
+        # "stop" received, shut down program gracefully
+        print("PROGRAM ENDED")
+        if isinstance(data_queue, PacketQueue):
+            print(f"Packets received: {data_queue.put_count}, coalesced: {data_queue.coalesced}")
     else:
         print("Invalid RUN_MODE or missing data_queue")
 
+    layout_task.cancel()
+    # release virtual input devices (uinput) rather than leaving them until the process exits
+    if hasattr(backend, 'close'):
+        backend.close()
+    tracer.close("controller")
 
-if __name__ == "__main__":
-    # After initializing mouse controller
+
+def mouse_test():
+    """Move the cursor to a test position and back to check the input backend works"""
     print("Testing mouse controller...")
+    init_backend()
     try:
-        original_pos = mouse.position
+        original_pos = backend.position
         print(f"Original position: {original_pos}")
         test_pos = (100, 100)
-        mouse.position = test_pos
+        backend.move(*test_pos)
         print(f"Moved to test position: {test_pos}")
         time.sleep(1)
-        mouse.position = original_pos
+        backend.move(*original_pos)
         print("Mouse controller test successful")
     except Exception as e:
         print(f"Mouse controller test failed: {e}")
 
-    asyncio.run(main())
\ No newline at end of file
+
+if __name__ == "__main__":
+    if STARTUP['mouse_test']:
+        mouse_test()
+
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+'''
+Landmark trajectory filters for control_machine.py
+Smooth the MOVE_ID (cursor) and INDEX_TIP (scroll) trajectories using packet capture timestamps, and extrapolate a
+few ms ahead to cancel pipeline latency. Both filters estimate velocity, so prediction comes for free
+    one_euro = One-Euro filter, cutoff rises with speed (low jitter when still, low lag when moving fast)
+    kalman   = constant velocity Kalman filter per axis
+    none     = pass through
+Coordinates are normalised (0->1), time in seconds
+'''
+
+import math
+from config import FILTER
+
+
+class PassThrough:
+    """No filtering or prediction"""
+
+    def __init__(self):
+        self.x = None
+
+    def __call__(self, x, y, t):
+        self.x = (x, y)
+        return x, y
+
+    def predict(self, horizon):
+        return self.x
+
+    def reset(self):
+        self.x = None
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """2D One-Euro filter (Casiez et al. 2012) sharing one speed-adaptive cutoff across both axes"""
+
+    def __init__(self, min_cutoff=FILTER['min_cutoff'], beta=FILTER['beta'], d_cutoff=FILTER['d_cutoff']):
+        self.min_cutoff = min_cutoff    # Hz - lower = less jitter at rest
+        self.beta = beta                # higher = less lag when moving fast
+        self.d_cutoff = d_cutoff        # Hz - smoothing of the velocity estimate
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.v = (0.0, 0.0)
+        self.t = None
+
+    def __call__(self, x, y, t):
+        if self.x is None:
+            self.x, self.t = (x, y), t
+            return self.x
+        if t <= self.t:
+            return self.x
+
+        dt = t - self.t
+        self.t = t
+
+        # smoothed velocity
+        a_d = _alpha(self.d_cutoff, dt)
+        vx = a_d * (x - self.x[0]) / dt + (1 - a_d) * self.v[0]
+        vy = a_d * (y - self.x[1]) / dt + (1 - a_d) * self.v[1]
+        self.v = (vx, vy)
+
+        # position with speed-adaptive cutoff
+        a = _alpha(self.min_cutoff + self.beta * math.hypot(vx, vy), dt)
+        self.x = (a * x + (1 - a) * self.x[0], a * y + (1 - a) * self.x[1])
+        return self.x
+
+    def predict(self, horizon):
+        """Filtered position extrapolated horizon seconds ahead"""
+        if self.x is None:
+            return None
+        return self.x[0] + self.v[0] * horizon, self.x[1] + self.v[1] * horizon
+
+
+class KalmanFilter:
+    """Constant velocity Kalman filter, run independently on x and y"""
+
+    def __init__(self, process_noise=FILTER['process_noise'], measurement_noise=FILTER['measurement_noise']):
+        self.q = process_noise          # acceleration noise (units/s^2)^2 - higher = follows changes faster
+        self.r = measurement_noise      # landmark noise variance - higher = smoother
+        self.reset()
+
+    def reset(self):
+        self.state = None               # per axis [position, velocity, P00, P01, P11]
+        self.t = None
+
+    def _step(self, axis, z, dt):
+        p, v, p00, p01, p11 = axis
+        q = self.q
+
+        # predict (white noise acceleration model)
+        p += v * dt
+        p00 += dt * (2 * p01 + dt * p11) + q * dt ** 4 / 4
+        p01 += dt * p11 + q * dt ** 3 / 2
+        p11 += q * dt ** 2
+
+        # update with measured position
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        innovation = z - p
+        p += k0 * innovation
+        v += k1 * innovation
+        p11 -= k1 * p01
+        p01 -= k0 * p01
+        p00 -= k0 * p00
+        return [p, v, p00, p01, p11]
+
+    def __call__(self, x, y, t):
+        if self.state is None:
+            self.state = [[x, 0.0, self.r, 0.0, 1.0], [y, 0.0, self.r, 0.0, 1.0]]
+            self.t = t
+        elif t > self.t:
+            dt = t - self.t
+            self.t = t
+            self.state = [self._step(self.state[0], x, dt), self._step(self.state[1], y, dt)]
+        return self.state[0][0], self.state[1][0]
+
+    def predict(self, horizon):
+        """Filtered position extrapolated horizon seconds ahead"""
+        if self.state is None:
+            return None
+        return tuple(axis[0] + axis[1] * horizon for axis in self.state)
+
+
+FILTERS = {'none': PassThrough, 'one_euro': OneEuroFilter, 'kalman': KalmanFilter}
+
+
+def create_filter(name=FILTER['type']):
+    if name not in FILTERS:
+        raise ValueError(f"Unknown filter: {name}")
+    return FILTERS[name]()
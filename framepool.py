@@ -0,0 +1,79 @@
+'''
+Preallocated frame buffers for the per-frame image path
+FramePool hands out uint8 frames by shape and takes them back once a frame is done with (dropped by a channel,
+skipped, or after landmarks are extracted), so at a steady resolution capture allocates nothing per frame
+ScratchBuffer is a single growable buffer for per-thread intermediates (RGB conversion, preview mirror) whose shape
+changes from frame to frame (ROI crops) - it returns contiguous views into one allocation
+'''
+
+import math
+import threading
+import numpy as np
+from config import FRAME_POOL
+
+
+class FramePool:
+    """Thread safe free lists of frames keyed by shape, keeps at most 'capacity' spare frames per shape"""
+
+    def __init__(self, capacity=FRAME_POOL['capacity']):
+        self.capacity = capacity
+        self._free = {}
+        self._lock = threading.Lock()
+        self.allocated = 0          # frames created by the pool
+        self.allocated_bytes = 0
+        self.reused = 0             # acquires served from a free list
+        self.released = 0
+        self.discarded = 0          # releases beyond capacity (left to the garbage collector)
+
+    def acquire(self, shape):
+        """Frame of the given shape - contents are undefined"""
+        shape = tuple(shape)
+        with self._lock:
+            free = self._free.get(shape)
+            if free:
+                self.reused += 1
+                return free.pop()
+            self.allocated += 1
+            self.allocated_bytes += int(np.prod(shape))
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, frame):
+        """Give a frame back for reuse - the caller must not touch it afterwards"""
+        if frame is None:
+            return
+        with self._lock:
+            self.released += 1
+            free = self._free.setdefault(frame.shape, [])
+            if len(free) < self.capacity:
+                free.append(frame)
+            else:
+                self.discarded += 1
+
+    @property
+    def in_use(self):
+        with self._lock:
+            return self.allocated + self.reused - self.released
+
+    def stats(self):
+        return {'allocated': self.allocated, 'allocated_mb': round(self.allocated_bytes / 1e6, 2),
+                'reused': self.reused, 'in_use': self.in_use, 'discarded': self.discarded}
+
+
+class ScratchBuffer:
+    """One reusable allocation returning contiguous uint8 views of any shape that fits (grows when needed)"""
+
+    def __init__(self):
+        self._buffer = np.empty(0, dtype=np.uint8)
+        self._view = self._buffer
+        self.grown = 0
+
+    def get(self, shape):
+        # same shape as last time (every frame without ROI) - reuse the view, building one costs more than the copy saves
+        if self._view.shape == shape:
+            return self._view
+        size = math.prod(shape)
+        if size > self._buffer.size:
+            self._buffer = np.empty(size, dtype=np.uint8)
+            self.grown += 1
+        self._view = self._buffer[:size].reshape(shape)
+        return self._view
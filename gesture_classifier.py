@@ -0,0 +1,145 @@
+'''
+Learned gesture classifier - alternative to the distance cascade in gestures.py
+Landmarks are turned into a pose feature vector that does not depend on where the hand is, how big it is or how it is
+rotated in the image (wrist at origin, wrist -> MOVE_ID axis pointing up, scaled by hand size, left hands mirrored),
+then a one hidden layer NumPy MLP predicts all gesture classes in a single call
+Train with train_classifier.py, then set CLASSIFIER['model'] in config.py to use it in the tracker
+'''
+
+import math
+import numpy as np
+from config import HAND_LANDMARKS, FRAME_SIZE, CLASSIFIER
+from gestures import gesture_features
+
+# output classes - cursor = moving with no command, the rest map to protocol packet kinds
+CLASSES = ('cursor', 'scroll', 'click', 'exit', 'tab_forward', 'tab_back', 'mission_control')
+CLASS_KINDS = {'click': b'C', 'exit': b'E', 'tab_forward': b'F', 'tab_back': b'B', 'mission_control': b'M'}
+KIND_CLASSES = {kind: CLASSES.index(name) for name, kind in CLASS_KINDS.items()}
+_SCROLL = CLASSES.index('scroll')
+
+_MOVE_ID = HAND_LANDMARKS['MOVE_ID']
+_SCALE = np.array([FRAME_SIZE['width'], FRAME_SIZE['height']], dtype=np.float32)
+NUM_FEATURES = 20 * 3 + 10
+
+
+def landmark_features(lm, hand_label='R'):
+    """Position, scale and rotation invariant feature vector for one hand (NUM_FEATURES,)"""
+    relative = lm[1:] - lm[0]
+    xy = relative[:, :2] * _SCALE
+    ax, ay = xy[_MOVE_ID - 1].tolist()
+    size = max(math.hypot(ax, ay), 1e-6)
+    ux, uy = ax / size, ay / size
+
+    # rotate so wrist -> MOVE_ID points up (0, -1), then scale by hand size (left hands mirrored)
+    mirror = -1.0 if hand_label == 'L' else 1.0
+    rotation = np.array([[-uy * mirror, -ux], [ux * mirror, -uy]], dtype=np.float32) / size
+
+    features = np.empty(NUM_FEATURES, dtype=np.float32)
+    features[:40].reshape(20, 2)[:] = xy @ rotation
+    # mediapipe z uses the same scale as x
+    features[40:60] = relative[:, 2] * (_SCALE[0] / size)
+    features[60:] = gesture_features(lm)
+    features[60:] /= size
+    return features
+
+
+class GestureClassifier:
+    """Feature standardisation + MLP (relu hidden layer, softmax over CLASSES)"""
+
+    def __init__(self, w1, b1, w2, b2, mean, std, min_confidence=CLASSIFIER['min_confidence']):
+        self.w1, self.b1, self.w2, self.b2 = w1, b1, w2, b2
+        self.mean, self.std = mean, std
+        self.min_confidence = min_confidence
+        # standardisation folded into the first layer, so a prediction is 2 small matrix products
+        self._w1 = (w1 / std[:, None]).astype(np.float32)
+        self._b1 = (b1 - (mean / std) @ w1).astype(np.float32)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if tuple(data['classes']) != CLASSES:
+                raise ValueError(f"Model {path} was trained for classes {tuple(data['classes'])}")
+            return cls(*(data[name].astype(np.float32) for name in ('w1', 'b1', 'w2', 'b2', 'mean', 'std')))
+
+    def save(self, path):
+        np.savez(path, w1=self.w1, b1=self.b1, w2=self.w2, b2=self.b2, mean=self.mean, std=self.std,
+                 classes=np.array(CLASSES))
+
+    def probabilities(self, features):
+        """Class probabilities for a (N, NUM_FEATURES) batch or a single feature vector"""
+        hidden = np.maximum(features @ self._w1 + self._b1, 0)
+        logits = hidden @ self.w2 + self.b2
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict(self, lm, hand_label='R'):
+        """(class name, confidence) for one hand"""
+        p = self.probabilities(landmark_features(lm, hand_label))
+        best = int(p.argmax())
+        return CLASSES[best], float(p[best])
+
+    def ratios(self, lm, hand_label='R'):
+        """
+        Same output as gestures.cascade_ratios: (scrolling, {command kind: ratio}), a command holding below 1
+        ratio = (1 - p) / (1 - min_confidence), so GESTURES['exit'] hysteresis applies to the class probability
+        """
+        p = self.probabilities(landmark_features(lm, hand_label)).tolist()
+        if p[_SCROLL] >= self.min_confidence:
+            return True, {}
+        margin = max(1.0 - self.min_confidence, 1e-6)
+        return False, {kind: (1.0 - p[index]) / margin for kind, index in KIND_CLASSES.items()}
+
+
+def load_classifier(path=CLASSIFIER['model']):
+    """Trained classifier from CLASSIFIER['model'], or None to use the distance cascade"""
+    if not path:
+        return None
+    classifier = GestureClassifier.load(path)
+    print(f"Using gesture classifier {path}")
+    return classifier
+
+
+def train(features, labels, hidden=CLASSIFIER['hidden'], epochs=500, learning_rate=0.01, weight_decay=1e-4, seed=0):
+    """Fit a GestureClassifier with full batch Adam on cross entropy (classes weighted by inverse frequency)"""
+    rng = np.random.default_rng(seed)
+    features = np.asarray(features, dtype=np.float32)
+    labels = np.asarray(labels, dtype=np.intp)
+    n, n_classes = len(labels), len(CLASSES)
+
+    mean = features.mean(axis=0)
+    std = features.std(axis=0) + 1e-6
+    x = (features - mean) / std
+    targets = np.eye(n_classes, dtype=np.float32)[labels]
+    counts = np.bincount(labels, minlength=n_classes)
+    weights = (n / (n_classes * np.maximum(counts, 1)))[labels].astype(np.float32)[:, None] / n
+
+    params = [rng.normal(0, np.sqrt(2 / x.shape[1]), (x.shape[1], hidden)).astype(np.float32),
+              np.zeros(hidden, dtype=np.float32),
+              rng.normal(0, np.sqrt(1 / hidden), (hidden, n_classes)).astype(np.float32),
+              np.zeros(n_classes, dtype=np.float32)]
+    moments = [np.zeros_like(p) for p in params]
+    velocities = [np.zeros_like(p) for p in params]
+
+    for step in range(1, epochs + 1):
+        w1, b1, w2, b2 = params
+        pre = x @ w1 + b1
+        h = np.maximum(pre, 0)
+        logits = h @ w2 + b2
+        logits -= logits.max(axis=1, keepdims=True)
+        p = np.exp(logits)
+        p /= p.sum(axis=1, keepdims=True)
+
+        # backprop weighted cross entropy
+        d_logits = (p - targets) * weights
+        d_h = d_logits @ w2.T * (pre > 0)
+        grads = [x.T @ d_h + weight_decay * w1, d_h.sum(axis=0), h.T @ d_logits + weight_decay * w2, d_logits.sum(axis=0)]
+
+        for i, g in enumerate(grads):
+            moments[i] = 0.9 * moments[i] + 0.1 * g
+            velocities[i] = 0.999 * velocities[i] + 0.001 * g * g
+            m = moments[i] / (1 - 0.9 ** step)
+            v = velocities[i] / (1 - 0.999 ** step)
+            params[i] -= learning_rate * m / (np.sqrt(v) + 1e-8)
+
+    return GestureClassifier(*params, mean.astype(np.float32), std.astype(np.float32))
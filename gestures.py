@@ -0,0 +1,224 @@
+'''
+Landmark arrays and gesture features shared by the tracking scripts
+Mediapipe landmarks are copied into a (21, 3) numpy array once per hand, then every distance the
+gesture cascade needs is computed over FEATURE_PAIRS in one pass
+Command gestures go through per-hand state machines (GestureStates) so each one is sent once per gesture
+'''
+
+import math
+import time
+import numpy as np
+from config import HAND_LANDMARKS, FRAME_SIZE, GESTURES
+from protocol import Packet
+
+NUM_LANDMARKS = 21
+
+# landmark pairs measured on every frame (name, landmark a, landmark b) - order = feature vector order
+FEATURE_PAIRS = (
+    ('HAND_SIZE', 'WRIST', 'MOVE_ID'),
+    ('WRIST_INDEX', 'WRIST', 'INDEX_TIP'),
+    ('WRIST_MIDDLE', 'WRIST', 'MIDDLE_TIP'),
+    ('WRIST_RING', 'WRIST', 'RING_TIP'),
+    ('WRIST_LITTLE', 'WRIST', 'LITTLE_TIP'),
+    ('THRESH', 'THUMB_TIP', 'THUMB_J'),
+    ('THUMB_INDEX', 'THUMB_TIP', 'INDEX_TIP'),
+    ('THUMB_MIDDLE', 'THUMB_TIP', 'MIDDLE_TIP'),
+    ('THUMB_RING', 'THUMB_TIP', 'RING_TIP'),
+    ('THUMB_LITTLE', 'THUMB_TIP', 'LITTLE_TIP'),
+)
+FEATURES = {name: i for i, (name, _, _) in enumerate(FEATURE_PAIRS)}
+
+_PAIRS = tuple((HAND_LANDMARKS[a], HAND_LANDMARKS[b]) for _, a, b in FEATURE_PAIRS)
+
+
+def dist(lm1, lm2, w, h):
+    """Calculate Euclidian distance between 2 landmarks (scalar reference for gesture_features)"""
+
+    dx = (lm1.x - lm2.x) * w
+    dy = (lm1.y - lm2.y) * h
+    return math.sqrt(dx ** 2 + dy ** 2)
+
+
+def landmarks_to_array(hand_landmarks):
+    """Copy mediapipe landmarks into a (21, 3) float32 array of normalised x, y, z"""
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32)
+
+
+def extract_hands(results):
+    """
+    Convert mediapipe results into a list of (hand_label, landmark array)
+    Called straight after hands.process so the frame and protobuf results can be released
+    """
+    if not results.multi_hand_landmarks:
+        return []
+
+    hands = []
+    for hand_landmarks, hand_info in zip(results.multi_hand_landmarks, results.multi_handedness):
+        # camera image is mirrored, so mediapipe's "Left" is the user's right hand
+        hand_label = 'R' if hand_info.classification[0].label == "Left" else 'L'
+        hands.append((hand_label, landmarks_to_array(hand_landmarks)))
+    return hands
+
+
+def gesture_features(lm, w=FRAME_SIZE['width'], h=FRAME_SIZE['height']):
+    """Pixel distances for every pair in FEATURE_PAIRS (list in FEATURE_PAIRS order)"""
+    # ten pairs per frame - plain floats beat numpy's per-call overhead on arrays this small
+    points = lm.tolist()
+    hypot = math.hypot
+    return [hypot((points[a][0] - points[b][0]) * w, (points[a][1] - points[b][1]) * h) for a, b in _PAIRS]
+
+
+def _clamp(value):
+    """Clamp normalised coordinate to 0->1"""
+    return max(0.0, min(1.0, value))
+
+
+# command gestures in cascade order
+COMMANDS = (b'C', b'E', b'F', b'B', b'M')
+
+
+class GestureFSM:
+    """
+    Edge triggered gesture: idle -> pending (condition met) -> fired (held for 'hold' s, event sent once)
+    -> releasing (condition lost) -> idle after 'release' s
+    Conditions are ratios that engage below 1 and, once engaged, only disengage above 'exit' (hysteresis)
+    """
+
+    IDLE, PENDING, FIRED, RELEASING = range(4)
+
+    def __init__(self, hold=0.0, release=GESTURES['release'], exit=GESTURES['exit']):
+        self.hold = hold
+        self.release = release
+        self.exit = exit
+        self.state = self.IDLE
+        self.since = 0.0
+
+    def update(self, ratio, t):
+        """Feed condition ratio (None = hand not in frame) at capture time t, returns True when the gesture fires"""
+        engaged = ratio is not None and ratio < (1.0 if self.state == self.IDLE else self.exit)
+
+        if self.state == self.IDLE:
+            if engaged:
+                self.state, self.since = self.PENDING, t
+        elif self.state == self.PENDING:
+            if not engaged:
+                self.state = self.IDLE
+        elif self.state == self.FIRED:
+            if not engaged:
+                self.state, self.since = self.RELEASING, t
+            return False
+        elif self.state == self.RELEASING:
+            if engaged:
+                self.state = self.FIRED
+            elif t - self.since >= self.release:
+                self.state = self.IDLE
+            return False
+
+        if self.state == self.PENDING and t - self.since >= self.hold:
+            self.state = self.FIRED
+            return True
+        return False
+
+
+class GestureStates:
+    """Command gesture state machines for each hand, plus counts of frames held vs events sent"""
+
+    def __init__(self, hold=GESTURES['hold']):
+        self.hold = hold
+        self.hands = {}
+        self.held_frames = 0        # frames in which a command condition held (= packets sent before)
+        self.events = 0
+
+    def update(self, hand_label, ratios, t):
+        """Feed {command: ratio} for one hand, returns commands that fired"""
+        machines = self.hands.get(hand_label)
+        if machines is None:
+            machines = self.hands[hand_label] = {kind: GestureFSM(self.hold[kind.decode()]) for kind in COMMANDS}
+        fired = []
+        for kind, machine in machines.items():
+            ratio = ratios.get(kind)
+            if ratio is not None and ratio < 1.0:
+                self.held_frames += 1
+            if machine.update(ratio, t):
+                fired.append(kind)
+        self.events += len(fired)
+        return fired
+
+    @property
+    def armed(self):
+        """True while any command is mid-hold (condition met, waiting to fire) - it needs frames even if nothing moves"""
+        return any(machine.state == GestureFSM.PENDING for machines in self.hands.values()
+                   for machine in machines.values())
+
+    def missing(self, present, t):
+        """Release gestures of hands that are not in this frame"""
+        for hand_label in self.hands:
+            if hand_label not in present:
+                self.update(hand_label, {}, t)
+
+    def stats(self):
+        return {'held_frames': self.held_frames, 'events': self.events}
+
+
+def cascade_ratios(lm):
+    """
+    Hand written gesture cascade: (scrolling, {command kind: ratio}), a command condition holds below 1
+    gesture_classifier.GestureClassifier.ratios is the learned equivalent
+    """
+    (hand_size, wrist_index, wrist_middle, wrist_ring, wrist_little,
+     thresh, thumb_index, thumb_middle, thumb_ring, thumb_little) = gesture_features(lm)
+
+    # CASE 1: scrolling mode (index + middle finger raised, ring + little finger curled)
+    if (hand_size / 2 < wrist_index and hand_size / 2 < wrist_middle and
+            hand_size > wrist_ring and hand_size > wrist_little):
+        return True, {}
+
+    # CASE 2: cursor mode - command conditions as ratios
+    thresh = max(thresh, 1e-6)
+    hand_size = max(hand_size, 1e-6)
+    return False, {
+        b'C': thumb_index / thresh,                                     # CASE 2.1 -> click
+        b'E': max(wrist_index / hand_size, wrist_middle / hand_size,    # CASE 2.2 -> exit (= close fist)
+                  2 * wrist_ring / hand_size, 2 * wrist_little / hand_size),
+        b'F': thumb_ring / thresh,                                      # CASE 2.3 -> change tab forward
+        b'B': thumb_middle / thresh,                                    # CASE 2.4 -> change tab backward
+        b'M': thumb_little / thresh,                                    # CASE 2.5 -> mission control
+    }
+
+
+def gesture_packets(hand_label, lm, timestamp=None, states=None, classifier=None):
+    """
+    Classify one hand and return the Packets to transmit (see protocol.py)
+    Coordinates are flipped and normalised to 0->1, timestamp = frame capture time
+    With states (GestureStates), commands are sent once per gesture instead of on every frame they hold
+    With classifier (GestureClassifier), the learned model replaces the distance cascade
+    """
+    if classifier is None:
+        scrolling, ratios = cascade_ratios(lm)
+    else:
+        scrolling, ratios = classifier.ratios(lm, hand_label)
+
+    if scrolling:
+        if states is not None:
+            # commands aren't evaluated while scrolling
+            states.update(hand_label, {}, timestamp if timestamp is not None else time.time())
+        # reference for scroll movement = tip of index finger
+        # reference for scroll anchor = MOVE_ID (base of middle finger)
+        scroll_loc = _clamp(1.0 - float(lm[HAND_LANDMARKS['INDEX_TIP'], 1]))
+        anchor_loc = _clamp(1.0 - float(lm[HAND_LANDMARKS['MOVE_ID'], 1]))
+        return [Packet(b'S', scroll_loc, anchor_loc, timestamp=timestamp)]
+
+    # cursor mode
+    x_loc = _clamp(1.0 - float(lm[HAND_LANDMARKS['MOVE_ID'], 0]))
+    y_loc = _clamp(1.0 - float(lm[HAND_LANDMARKS['MOVE_ID'], 1]))
+    packets = [Packet(hand_label.encode(), x_loc, y_loc, timestamp=timestamp)]
+
+    if states is None:
+        # level triggered - a command on every frame its condition holds
+        fired = [kind for kind in COMMANDS if ratios.get(kind, 2.0) < 1.0]
+    else:
+        fired = states.update(hand_label, ratios, timestamp if timestamp is not None else time.time())
+
+    for kind in fired:
+        packets.append(Packet(kind, timestamp=timestamp))
+    return packets
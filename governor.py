@@ -0,0 +1,65 @@
+'''
+Adaptive quality governor for the tracker
+Watches capture -> landmark latency and the tracker's frame rate (counted before stride skips), and steps through
+GOVERNOR['levels'] (capture resolution, inference stride, mediapipe model complexity) to hold the latency budget on
+whatever hardware it runs on
+Each level is cheaper than the one before it; every decision is logged
+'''
+
+import time
+from collections import deque
+from config import GOVERNOR
+
+
+class QualityGovernor:
+    """Picks a quality level from measured latency / FPS, at most once per GOVERNOR['interval'] seconds"""
+
+    def __init__(self, levels=GOVERNOR['levels'], start_level=GOVERNOR['start_level'], budget_ms=GOVERNOR['budget_ms'],
+                 target_fps=GOVERNOR['target_fps'], headroom=GOVERNOR['headroom'], interval=GOVERNOR['interval']):
+        self.levels = levels
+        self.index = start_level
+        self.budget = budget_ms / 1000
+        self.target_fps = target_fps
+        self.headroom = headroom            # only step up when p95 latency is below headroom * budget
+        self.interval = interval
+        self.latencies = deque(maxlen=256)
+        self.fps = None
+        self.decisions = []                 # (time, from level, to level, reason)
+        self._last_decision = time.time()
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def observe_latency(self, seconds):
+        """Capture -> landmarks latency of one frame"""
+        self.latencies.append(seconds)
+
+    def observe_fps(self, fps):
+        """Frames reaching the tracker per second, counted before stride skips (comparable with target_fps)"""
+        self.fps = fps
+
+    def update(self, now=None):
+        """Re-evaluate quality level, returns new level dict if it changed (else None)"""
+        now = time.time() if now is None else now
+        if now - self._last_decision < self.interval or len(self.latencies) < 10 or self.fps is None:
+            return None
+        self._last_decision = now
+
+        ordered = sorted(self.latencies)
+        p95 = ordered[int(len(ordered) * 0.95)]
+        self.latencies.clear()
+        stats = f"p95 latency {p95 * 1000:.1f}ms (budget {self.budget * 1000:.0f}ms), {self.fps:.1f} fps (target {self.target_fps})"
+
+        if (p95 > self.budget or self.fps < 0.9 * self.target_fps) and self.index < len(self.levels) - 1:
+            return self._change(now, self.index + 1, f"over budget: {stats}")
+        # small tolerance - a camera delivering 29.x of a 30 fps target can still step back up
+        if p95 < self.headroom * self.budget and self.fps >= 0.95 * self.target_fps and self.index > 0:
+            return self._change(now, self.index - 1, f"headroom: {stats}")
+        return None
+
+    def _change(self, now, index, reason):
+        self.decisions.append((now, self.index, index, reason))
+        print(f"Quality governor: level {self.index} -> {index} {self.levels[index]} ({reason})")
+        self.index = index
+        return self.level
@@ -3,66 +3,159 @@ Hand tracking script acting with full keyboard + mouse controls
 Call script directly only when processing camera feed on a separate machine (e.g. Raspberry Pi)
 '''
 
+from startup_profile import profiler      # first, so interpreter + import time is profiled
 import cv2
-import mediapipe as mp
-import math
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-import struct
 import time
-from config import HAND_LANDMARKS, FRAME_SIZE
+from config import FRAME_SIZE, QUEUES, INFERENCE, PIPELINE, PROTOCOL, TRANSPORT, SESSION, GOVERNOR, MOTION, PREVIEW
+from config import STARTUP
+from gestures import gesture_packets, GestureStates
+from gesture_classifier import load_classifier
+from channels import LatestChannel
+from inference import InferencePool
+from transport import create_sender
+from tracing import tracer
+from session import SessionRecorder, Session, ReplayCamera
+from governor import QualityGovernor
+from motion_gate import MotionGate
+from framepool import FramePool
+from preview import Preview, resolve_mode
 
 # define RUN_MODE
 RUN_MODE = "serial" if __name__ == "__main__" else "async"
-print(f"Running in {RUN_MODE} mode")
 
-# initialise mediapipe
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5,
-)
+# adjusts capture resolution, inference stride and model complexity to hold the latency budget
+governor = QualityGovernor() if GOVERNOR['enabled'] else None
 
-# initialize camera
-cap = cv2.VideoCapture(0)  # Remove V4L2 backend specification
-# optimise camera
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_SIZE['width'])
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_SIZE['height'])
-cap.set(cv2.CAP_PROP_FPS, 60)
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # low latency
+# skips inference while the scene is static, and drops to idle capture rate when nobody is there
+gate = MotionGate() if MOTION['enabled'] else None
 
-### optional: open camera in fullscreen
-# window_name = "Hand Tracking"
-# cv2.namedWindow(window_name, cv2.WND_PROP_FULLSCREEN)
-# cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+# reused capture buffers - every frame read goes back here once it is dropped, skipped or inferred
+frame_pool = FramePool()
 
-executor = ThreadPoolExecutor()
+# mediapipe runs on dedicated worker threads, each owning its own backend instance (started in main)
+inference_pool = InferencePool(workers=INFERENCE['workers'], backend=INFERENCE['backend'],
+                               complexity=governor.level['complexity'] if governor is not None else 1,
+                               frame_pool=frame_pool)
 
+# camera is opened in main (not at import) so the multi-process pipeline can own it instead
+cap = None
 
-def dist(lm1, lm2, w, h):
-    """Calculate Euclidian distance between 2 landmarks"""
 
-    dx = (lm1.x - lm2.x) * w
-    dy = (lm1.y - lm2.y) * h
-    return math.sqrt(dx ** 2 + dy ** 2)
+def open_camera():
+    """Initialize and optimise camera (or replay a recorded session if SESSION['source'] is set)"""
+    if SESSION['source']:
+        return ReplayCamera(Session(SESSION['source']), realtime=True)
+
+    size = governor.level if governor is not None else FRAME_SIZE
+    camera = cv2.VideoCapture(0)  # Remove V4L2 backend specification
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, size['width'])
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, size['height'])
+    camera.set(cv2.CAP_PROP_FPS, 60)
+    camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # low latency
+    return camera
+
+
+capture_size = None
+
+
+def set_capture_size(size, fps=60):
+    """Request new camera resolution / frame rate (only when it changed)"""
+    global capture_size
+    requested = (size['width'], size['height'], fps)
+    if requested != capture_size:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, size['width'])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size['height'])
+        cap.set(cv2.CAP_PROP_FPS, fps)
+        capture_size = requested
+
+
+def capture_settings():
+    """Capture (size, fps) - idle settings while the motion gate is idle, else the governor level"""
+    if gate is not None and gate.idle:
+        return MOTION['idle_size'], MOTION['idle_fps']
+    return (governor.level if governor is not None else FRAME_SIZE), 60
+
+# rate limited preview on its own thread (window / MJPEG stream), or headless (started in main)
+preview = Preview(resolve_mode(PREVIEW['mode'], RUN_MODE))
+
+# thread for blocking camera reads (created in main)
+executor = None
+
+# link to control_machine.py in serial mode (serial / UDP / TCP, see transport.py) - opened in main
+link = None
+
+# command gestures are sent once per gesture rather than every frame
+gesture_states = GestureStates()
+
+# learned gesture classifier (None = distance cascade) - loaded in main
+classifier = None
+
+# optional session recorder (SESSION['record_path'])
+recorder = SessionRecorder(SESSION['record_path'], SESSION['record_frames']) if SESSION['record_path'] else None
+
+
+async def collect_landmarks(pending, slots, landmark_queue):
+    """Await inference results in capture order and pass landmarks on to send_data"""
+
+    while True:
+        item = await pending.get()
+        if item is None:
+            # pass shutdown on to send_data
+            await landmark_queue.put(None)
+            break
+
+        timestamp, future = item
+        try:
+            hands_lm = await future
+        except Exception as e:
+            print(f"Inference error: {e}")
+            continue
+        finally:
+            slots.release()
+        if hands_lm is None:
+            # live_stream backend skipped the frame while busy with an earlier one
+            continue
+
+        #print("Hand detected:", bool(hands_lm))  # Debug print
+        if hands_lm:
+            profiler.milestone('first_landmarks')
+        if gate is not None:
+            gate.hand_seen(timestamp, bool(hands_lm))
+        preview.set_landmarks(hands_lm)
+        if governor is not None:
+            governor.observe_latency(time.time() - timestamp)
+
+        await landmark_queue.put((timestamp, hands_lm))
 
 
 async def process_frame(frame_queue, landmark_queue):
     """Process each camera frame to track hand movements"""
 
+    # futures for frames currently in inference - a slot is taken before submitting, so the pool never has more
+    # frames than the workers can have in flight and submit() never waits on the event loop thread
+    slots = asyncio.Semaphore(inference_pool.depth)
+    pending = asyncio.Queue()
+    collector = asyncio.create_task(collect_landmarks(pending, slots, landmark_queue))
+
     # calculate real FPS
     frame_count = 0
     start_time = time.time()
 
+    # inference stride (governor can skip frames to save CPU)
+    frame_index = 0
+    stride_skipped = 0
+
     while True:
-        frame = await frame_queue.get()
-        if frame is None:
+        item = await frame_queue.get()
+        if item is None:
+            await pending.put(None)
+            await collector
             break
+        timestamp, frame = item
 
-        # Increment frame count
+        # Increment frame count (before the stride skip - the governor compares this with the camera's target fps)
         frame_count += 1
 
         # Calculate elapsed time
@@ -72,251 +165,204 @@ async def process_frame(frame_queue, landmark_queue):
         if elapsed_time > 1.0:
             fps = frame_count / elapsed_time
             #print(f"FPS: {fps:.2f}")
+            tracer.gauge('fps', round(fps, 2))
+            tracer.gauge('stride_skipped', stride_skipped)
+            if gate is not None:
+                tracer.gauge('motion_skipped', gate.skipped)
+                tracer.gauge('idle', gate.idle)
+            tracer.gauge('frames_allocated', frame_pool.allocated)
+            tracer.gauge('inference_skipped', inference_pool.skipped)
             frame_count = 0  # Reset frame count
             start_time = time.time()  # Reset start time
 
-        # Convert frame to RGB for Mediapipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-        # get landmarks via mediapipe and append to Asyncio queue
-        results = hands.process(rgb_frame)
-        
-        #print("Hand detected:", bool(results.multi_hand_landmarks))  # Debug print
-        
-        # Put both frame and results in the landmark queue
-        await landmark_queue.put((frame, results))
+            # let governor re-evaluate quality level from measured fps + latency (idle fps is deliberately low)
+            if governor is not None and not (gate is not None and gate.idle):
+                governor.observe_fps(fps)
+                level = governor.update()
+                if level is not None:
+                    inference_pool.set_complexity(level['complexity'])
+
+        frame_index += 1
+        stride = governor.level['stride'] if governor is not None else 1
+        if frame_index % stride:
+            stride_skipped += 1
+            frame_pool.release(frame)
+            continue
+
+        # skip inference when nothing moved since the last inferred frame (unless a gesture is waiting out its hold)
+        if gate is not None and not gate.check(frame, timestamp, gesture_states.armed):
+            frame_pool.release(frame)
+            continue
+
+        # hand frame to an inference worker (RGB conversion + mediapipe run off the event loop)
+        # landmarks come back as (21, 3) arrays so the frame can be released straight away
+        await slots.acquire()
+        await pending.put((timestamp, asyncio.wrap_future(inference_pool.submit(frame, timestamp))))
+
+
+async def transmit(packet, data_queue, link):
+    """Send one packet over the link (RUN_MODE = serial) or append it to the shared queue (RUN_MODE = async)"""
+    if link is not None:
+        link.send(packet)
+    else:
+        await data_queue.put(packet)
 
 
-async def send_data(landmark_queue, data_queue, serial_port):
+async def send_data(landmark_queue, data_queue, link):
     """
-    RUN_MODE = serial: sends data packets over serial to be read by control_machine.py
+    RUN_MODE = serial: sends data packets over the link (serial / UDP / TCP) to be read by control_machine.py
     RUN_MODE = async: appends data packets to queues to be read by control_machine.py
     """
 
     while True:
         try:
-            frame, results = await landmark_queue.get()
-            
-            if results.multi_hand_landmarks:
-                # print("Processing hand landmarks")  # Debug print
-                for hand_landmarks, hand_info in zip(results.multi_hand_landmarks, results.multi_handedness):
-                    hand_label = 'R' if hand_info.classification[0].label == "Left" else 'L'
-                    # print(f"Hand detected: {hand_label}")  # Debug print
-
-                    # calculate hand size
-                    HAND_SIZE = dist(
-                        hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                        hand_landmarks.landmark[HAND_LANDMARKS['MOVE_ID']],
-                        FRAME_SIZE['width'], FRAME_SIZE['height'])
-                    
-                    # CASE 1: Check if in scrolling mode
-                    if (
-                            HAND_SIZE/2 <
-                            dist(hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                                 hand_landmarks.landmark[HAND_LANDMARKS['INDEX_TIP']],
-                                 FRAME_SIZE['width'], FRAME_SIZE['height']) and
-                            HAND_SIZE/2 <
-                            dist(hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                                 hand_landmarks.landmark[HAND_LANDMARKS['MIDDLE_TIP']],
-                                 FRAME_SIZE['width'], FRAME_SIZE['height']) and
-                            HAND_SIZE >
-                            dist(hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                                 hand_landmarks.landmark[HAND_LANDMARKS['RING_TIP']],
-                                 FRAME_SIZE['width'], FRAME_SIZE['height']) and
-                            HAND_SIZE >
-                            dist(hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                                 hand_landmarks.landmark[HAND_LANDMARKS['LITTLE_TIP']],
-                                 FRAME_SIZE['width'], FRAME_SIZE['height'])
-                    ):
-                        print("Scroll mode detected")  # Debug print
-                        # reference for scroll movement = tip of index finger
-                        scroll_loc = hand_landmarks.landmark[HAND_LANDMARKS['INDEX_TIP']]
-                        # reference for scroll anchor = MOVE_ID (base of middle finger)
-                        anchor_loc = hand_landmarks.landmark[HAND_LANDMARKS['MOVE_ID']]
-
-                        # normalise coord and flip axis
-                        scroll_loc = 1.0 - scroll_loc.y
-                        anchor_loc = 1.0 - anchor_loc.y
-
-                        # Clamp values between 0 and 1000
-                        scroll_loc = max(0, min(1.0, scroll_loc))
-                        anchor_loc = max(0, min(1.0, anchor_loc))
-
-                        # scale float to integer for efficient sending over serial
-                        scroll_loc = int(scroll_loc * 1000)
-                        anchor_loc = int(anchor_loc * 1000)
-
-                        # binary encode the data for sending over serial with no padding
-                        # 6 bytes = 1 char (S for scrolling) + 2 int (scroll and move y-locations) + newline
-                        data = struct.pack('=c2H', b'S', scroll_loc, anchor_loc) + b'\n'
-
-                        # transmit data depending on mode
-                        if RUN_MODE == "serial":
-                            serial_port.write(data)
-                        else:
-                            print(f"Sending scroll data to queue: {data}")  # Debug print
-                            await data_queue.put(data)
-
-                    # CASE 2: cursor mode
-                    else:
-                        # Get cursor position
-                        loc = hand_landmarks.landmark[HAND_LANDMARKS['MOVE_ID']]
-                        x_loc, y_loc = 1.0 - loc.x, 1.0 - loc.y
-
-                        # Clamp values between 0 and 1000 before converting to integers
-                        x_loc = max(0, min(1.0, x_loc))
-                        y_loc = max(0, min(1.0, y_loc))
-
-                        # Convert to integers (0-1000 range)
-                        x_loc = int(x_loc * 1000)
-                        y_loc = int(y_loc * 1000)
-
-                        data = struct.pack('=c2H', hand_label.encode(), x_loc, y_loc) + b'\n'
-                        if RUN_MODE == "serial":
-                            serial_port.write(data)
-                        else:
-                            # print(f"Sending cursor data to queue: {data}")  # Debug print
-                            await data_queue.put(data)
-
-                        # Check for click
-                        THRESH = dist(
-                            hand_landmarks.landmark[HAND_LANDMARKS['THUMB_TIP']],
-                            hand_landmarks.landmark[HAND_LANDMARKS['THUMB_J']],
-                            FRAME_SIZE['width'], FRAME_SIZE['height'])
-                        click = dist(
-                            hand_landmarks.landmark[HAND_LANDMARKS['THUMB_TIP']],
-                            hand_landmarks.landmark[HAND_LANDMARKS['INDEX_TIP']],
-                            FRAME_SIZE['width'], FRAME_SIZE['height'])
-
-                        if THRESH > click:
-                            # print("Click detected!")  # Debug print
-                            if RUN_MODE == "serial":
-                                serial_port.write(b'C\n')
-                            else:
-                                await data_queue.put(b'C\n')
-
-                        ## CASE 2.2 -> exit (= close fist)
-                        if (
-                                HAND_SIZE >
-                                dist(hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                                     hand_landmarks.landmark[HAND_LANDMARKS['INDEX_TIP']],
-                                     FRAME_SIZE['width'], FRAME_SIZE['height']) and
-                                HAND_SIZE >
-                                dist(hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                                     hand_landmarks.landmark[HAND_LANDMARKS['MIDDLE_TIP']],
-                                     FRAME_SIZE['width'], FRAME_SIZE['height']) and
-                                HAND_SIZE/2 >
-                                dist(hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                                     hand_landmarks.landmark[HAND_LANDMARKS['RING_TIP']],
-                                     FRAME_SIZE['width'], FRAME_SIZE['height']) and
-                                HAND_SIZE/2 >
-                                dist(hand_landmarks.landmark[HAND_LANDMARKS['WRIST']],
-                                     hand_landmarks.landmark[HAND_LANDMARKS['LITTLE_TIP']],
-                                     FRAME_SIZE['width'], FRAME_SIZE['height'])
-                        ):
-                            # send 1 byte
-                            if RUN_MODE == "serial":
-                                serial_port.write(b'E\n')
-                            else:
-                                await data_queue.put(b'E\n')
-
-                        ## CASE 2.3 -> change tab forward
-                        tabf = dist(
-                            hand_landmarks.landmark[HAND_LANDMARKS['THUMB_TIP']],
-                            hand_landmarks.landmark[HAND_LANDMARKS['RING_TIP']],
-                            FRAME_SIZE['width'], FRAME_SIZE['height'])
-
-                        if THRESH > tabf:
-                            # send 1 byte
-                            if RUN_MODE == "serial":
-                                serial_port.write(b'F\n')
-                            else:
-                                await data_queue.put(b'F\n')
-
-                        ## CASE 2.4 -> change tab backward
-                        tabb = dist(
-                            hand_landmarks.landmark[HAND_LANDMARKS['THUMB_TIP']],
-                            hand_landmarks.landmark[HAND_LANDMARKS['MIDDLE_TIP']],
-                            FRAME_SIZE['width'], FRAME_SIZE['height'])
-
-                        if THRESH > tabb:
-                            # send 1 byte
-                            if RUN_MODE == "serial":
-                                serial_port.write(b'B\n')
-                            else:
-                                await data_queue.put(b'B\n')
-
-                        ## CASE 2.5 -> mission control
-                        tabb = dist(
-                            hand_landmarks.landmark[HAND_LANDMARKS['THUMB_TIP']],
-                            hand_landmarks.landmark[HAND_LANDMARKS['LITTLE_TIP']],
-                            FRAME_SIZE['width'], FRAME_SIZE['height'])
-
-                        if THRESH > tabb:
-                            # send 1 byte
-                            if RUN_MODE == "serial":
-                                serial_port.write(b'M\n')
-                            else:
-                                await data_queue.put(b'M\n')
+            item = await landmark_queue.get()
+            if item is None:
+                break
+            timestamp, hands_lm = item
+            if recorder is not None:
+                recorder.add_landmarks(timestamp, hands_lm)
+
+            # hands that left the frame release their gestures
+            gesture_states.missing([hand_label for hand_label, _ in hands_lm], timestamp)
+
+            for hand_label, lm in hands_lm:
+                # print(f"Hand detected: {hand_label}")  # Debug print
+                start = time.perf_counter()
+                packets = gesture_packets(hand_label, lm, timestamp, gesture_states, classifier)
+                tracer.since('classify', start)
+
+                start = time.perf_counter()
+                for packet in packets:
+                    await transmit(packet, data_queue, link)
+                tracer.since('transmit', start)
+                if packets:
+                    # final milestone when the controller is in another process, else control_machine reports
+                    profiler.milestone('first_packet', role='tracker' if link is not None else None)
 
         except Exception as e:
             print(f"Error in send_data: {e}")
             print(f"Error details:", str(e.__class__), str(e))  # More detailed error info
 
 
+def open_link():
+    """Link to control_machine in serial mode (ports / addresses in TRANSPORT), else the link already set"""
+    if RUN_MODE != "serial":
+        return link
+    sender = create_sender()
+    # agree protocol version with control_machine (falls back to version 1 if it doesn't answer)
+    version = sender.open(PROTOCOL['version'])
+    print(f"Using {TRANSPORT['type']} link, protocol version {version}")
+    return sender
+
+
+async def start_up():
+    """Bring up camera, link, mediapipe and classifier in parallel - returns once all are ready"""
+    global cap, link, classifier, executor
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+
+    # mediapipe graphs build (and warm up on a blank frame) on the inference threads while the camera opens
+    size = capture_settings()[0]
+    inference_pool.start(warmup_shape=(size['height'], size['width'], 3) if STARTUP['warmup'] else None)
+
+    cap, link, classifier, _ = await asyncio.gather(
+        asyncio.to_thread(profiler.call, 'camera', open_camera),
+        asyncio.to_thread(profiler.call, 'link', open_link),
+        asyncio.to_thread(profiler.call, 'classifier', load_classifier),
+        asyncio.to_thread(profiler.call, 'inference_ready', inference_pool.wait_ready),
+    )
+
+
 async def main(data_queue=None):
     """Main event loop"""
+    print(f"Running in {RUN_MODE} mode")
+    profiler.milestone('main')
+    await start_up()
 
-    # initialize serial communication conditionally
-    if RUN_MODE == "serial":
-        import serial
-        ## EDIT PORT based to your camera input
-        serial_port = serial.Serial('/dev/ttyGS0', 115200, timeout=1)
-    else:
-        serial_port = None
-
-    frame_queue = asyncio.Queue()               # stores camera frames
-    landmark_queue = asyncio.Queue()            # stores landmarks within the frames
+    # bounded queues - if a stage falls behind, stale items are dropped rather than piling up
+    frame_queue = LatestChannel(**QUEUES['frame'], name="frame",               # stores camera frames
+                                on_drop=lambda item: frame_pool.release(item[1]))
+    landmark_queue = LatestChannel(**QUEUES['landmark'], name="landmark")      # stores landmarks within the frames
 
     if not cap.isOpened():
         print("Error: Unable to open camera.")
+        inference_pool.close()
         return
 
-    # Create window for display
-    cv2.namedWindow("Hand Tracking")
+    preview.start()
+    print(f"Preview: {preview.mode}")
+
+    tracer.start_reporter("tracker")
 
     # create and immediately run tasks
     async with asyncio.TaskGroup() as tg:
         tg.create_task(process_frame(frame_queue, landmark_queue))
-        tg.create_task(send_data(landmark_queue, data_queue, serial_port))
+        tg.create_task(send_data(landmark_queue, data_queue, link))
+
+        last_read = 0.0
+        frame_shape = None          # shape of last captured frame (first read lets the camera choose)
+        while cap.isOpened() and not preview.quit:
+            # apply capture resolution chosen by governor / motion gate (between reads, never during one)
+            size, fps = capture_settings()
+            if governor is not None or gate is not None:
+                set_capture_size(size, fps)
+
+            # cameras that ignore CAP_PROP_FPS are throttled here while idle
+            if fps < 60:
+                await asyncio.sleep(max(0.0, last_read + 1 / fps - time.perf_counter()))
+            last_read = time.perf_counter()
 
-        while cap.isOpened():
             # send to run on separate thread (reading frames is blocking process)
-            ret, frame = await asyncio.get_event_loop().run_in_executor(executor, cap.read)
+            # read straight into a pooled buffer
+            buffer = frame_pool.acquire(frame_shape) if frame_shape is not None else None
+            start = time.perf_counter()
+            ret, frame = await asyncio.get_event_loop().run_in_executor(executor, cap.read, buffer)
+            tracer.since('capture', start)
             if not ret:
                 print("Failed to grab frame")
                 break
-
-            # attach frame to queue for processing
-            await frame_queue.put(frame)
-
-            try:
-                # Display the frame with hand landmarks
-                mirror = cv2.flip(frame, 1)  # Mirror the frame horizontally
-                cv2.imshow("Hand Tracking", mirror)
-                
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    print("Quitting...")
-                    break
-                    
-            except Exception as e:
-                print(f"Display error: {e}")
+            profiler.milestone('first_frame')
+            if frame is not buffer:
+                # resolution changed (or first frame) - camera allocated a new frame, which the pool adopts later
+                frame_pool.release(buffer)
+                frame_shape = frame.shape
+
+            # attach frame (+ capture time) to queue for processing
+            timestamp = time.time()
+            if recorder is not None:
+                recorder.add_frame(timestamp, frame)
+            # preview copies the frame only when due (before it is handed on and released to the pool)
+            preview.offer(frame)
+            preview.poll()
+            await frame_queue.put((timestamp, frame))
+
+        # signal processing tasks to stop so the task group can exit
+        await frame_queue.put(None)
 
     print("Cleaning up...")
+    for channel in (frame_queue, landmark_queue):
+        print(f"{channel.name} queue: {channel.put_count} queued, {channel.dropped} dropped")
+    if gate is not None:
+        print(f"Motion gate: {gate.stats()}")
+    print(f"Frame pool: {frame_pool.stats()}")
+    print(f"Gestures: {gesture_states.stats()}")
+    if link is not None:
+        print(f"Link: {link.stats()}")
+        link.close()
     # stop processes
     cap.release()
-    cv2.destroyAllWindows()
+    inference_pool.close()
+    if recorder is not None:
+        recorder.save()
+    tracer.close("tracker")
+    preview.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if PIPELINE['processes']:
+        # capture, inference and gesture/transmit in separate processes
+        import process_pipeline
+        process_pipeline.run()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,187 @@
+'''
+Runs hand inference off the asyncio event loop
+Each worker thread owns its own inference backend (see inference_backends.py) and is fed frames through a handoff
+queue - submit() never blocks, callers keep at most pool.depth frames in flight
+Results are returned as concurrent futures - wrap them with asyncio.wrap_future inside the event loop
+A future resolves to None when a live_stream backend skipped the frame
+'''
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import cv2
+import numpy as np
+from tracing import tracer
+from roi import RoiTracker
+from config import ROI, INFERENCE, STARTUP
+from framepool import ScratchBuffer
+from startup_profile import profiler
+from inference_backends import create_backend, in_flight
+
+
+class InferencePool:
+    """Pool of worker threads that each convert frames to RGB and hand them to their inference backend"""
+
+    def __init__(self, workers=1, backend=INFERENCE['backend'], complexity=1, frame_pool=None, factory=create_backend):
+        if ROI['enabled'] and backend == 'live_stream':
+            # live_stream results arrive on mediapipe's thread while the worker crops the next frames from a box that
+            # is in_flight results stale - cropping needs the result of the previous frame before the next one
+            raise ValueError("ROI['enabled'] does not work with the live_stream inference backend - "
+                             "disable ROI or use INFERENCE['backend'] = 'video' / 'solutions'")
+        self.workers = max(1, workers)
+        self.backend = backend          # name in inference_backends.BACKENDS
+        self.factory = factory
+        self.complexity = complexity    # legacy model complexity (0 = lite, 1 = full), ignored by tasks backends
+        self.frame_pool = frame_pool    # submitted frames are released to this pool once converted to RGB
+        self.depth = self.workers * in_flight(backend)     # frames that can be in inference at once
+        self.processed = 0
+        self.skipped = 0
+        self._handoff = queue.Queue()      # unbounded - callers bound frames in flight to depth
+        self._threads = []
+        self._ready = []
+        self._error = None          # first backend build / warm-up error, raised by wait_ready
+
+    def start(self, warmup_shape=None):
+        """
+        Start worker threads (each builds its own backend in the background)
+        warmup_shape = (height, width, 3) runs each graph once on a blank frame of that shape before the first real one
+        """
+        if self._threads:
+            return
+        if INFERENCE['cv_threads'] is not None:
+            cv2.setNumThreads(INFERENCE['cv_threads'])
+        for i in range(self.workers):
+            ready = threading.Event()
+            thread = threading.Thread(target=self._run, args=(i, ready, warmup_shape), name=f"inference-{i}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            self._ready.append(ready)
+
+    def wait_ready(self, timeout=None):
+        """Block until every worker has built (and warmed up) its backend
+        Re-raises the error of a worker whose backend failed to build (e.g. missing .task model)"""
+        ready = all(event.wait(timeout) for event in self._ready)
+        if self._error is not None:
+            raise self._error
+        return ready
+
+    def submit(self, frame, timestamp=None):
+        """Queue a BGR frame for inference, returns a future resolving to a list of (hand_label, landmark array)
+        The pool takes ownership of the frame (it goes back to frame_pool when done)
+        Never blocks, so it is safe on the event loop thread - wait for a free slot (see depth) before calling"""
+        future = Future()
+        self._handoff.put_nowait((future, frame, time.time() if timestamp is None else timestamp))
+        return future
+
+    def set_complexity(self, complexity):
+        """Change model complexity - each legacy worker rebuilds its backend before its next frame"""
+        self.complexity = complexity
+
+    def close(self):
+        """Stop worker threads once queued frames are processed"""
+        for _ in self._threads:
+            self._handoff.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._ready = []
+
+    def _run(self, index, ready, warmup_shape):
+        complexity = self.complexity
+        rgb = ScratchBuffer()       # reused RGB destination (mediapipe copies its input, so it is free after submit)
+        backend = None
+        try:
+            with profiler.phase(f"mediapipe_build[{index}]"):
+                backend = self.factory(self.backend, complexity)
+            if warmup_shape is not None:
+                # first frame loads the model and sizes internal buffers - pay that before the camera is live
+                with profiler.phase(f"mediapipe_warmup[{index}]"):
+                    warmed = threading.Event()
+                    blank = np.zeros(warmup_shape, dtype=np.uint8)
+                    backend.submit(cv2.cvtColor(blank, cv2.COLOR_BGR2RGB, dst=rgb.get(blank.shape)), 0.0,
+                                   lambda hands_lm: warmed.set())
+                    if not warmed.wait(STARTUP['warmup_timeout']):
+                        print(f"Inference worker {index}: warm-up gave no result after "
+                              f"{STARTUP['warmup_timeout']}s, carrying on")
+        except Exception as e:
+            print(f"Inference worker {index}: failed to build {self.backend} backend: {e}")
+            if self._error is None:
+                self._error = e
+            if backend is not None:
+                backend.close()
+            ready.set()
+            self._fail(e)
+            return
+        ready.set()
+        roi = RoiTracker() if ROI['enabled'] else None
+        try:
+            while True:
+                item = self._handoff.get()
+                if item is None:
+                    break
+                future, frame, timestamp = item
+                if not future.set_running_or_notify_cancel():
+                    self._release(frame)
+                    continue
+                try:
+                    if complexity != self.complexity and self.backend == 'solutions':
+                        # build the new graph first - if that fails the old one keeps serving frames
+                        complexity = self.complexity
+                        rebuilt = self.factory(self.backend, complexity)
+                        backend.close()
+                        backend = rebuilt
+                    # cvtColor and mediapipe both release the GIL, so the event loop keeps running meanwhile
+                    start = time.perf_counter()
+                    if roi is not None:
+                        # only run mediapipe on the area around the previous hand position
+                        crop, region = roi.crop(frame)
+                    else:
+                        crop, region = frame, None
+                    rgb_frame = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=rgb.get(crop.shape))
+                    converted = time.perf_counter()
+                    tracer.record('convert', converted - start)
+                    # sync backends call back before submit returns, live_stream from mediapipe's thread
+                    backend.submit(rgb_frame, timestamp, self._callback(future, roi, region, frame.shape, converted))
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    self._release(frame)
+        finally:
+            backend.close()
+
+    def _fail(self, error):
+        """Worker without a backend - fail every frame handed to it until close() so nobody waits forever"""
+        while True:
+            item = self._handoff.get()
+            if item is None:
+                break
+            future, frame, timestamp = item
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+            self._release(frame)
+
+    def _callback(self, future, roi, region, frame_shape, submitted):
+        """done(hands_lm) for one frame - maps ROI crops back to the full frame and resolves the future"""
+        def done(hands_lm):
+            if future.done():
+                return
+            try:
+                if hands_lm is None:
+                    self.skipped += 1
+                else:
+                    if roi is not None:
+                        roi.remap(hands_lm, region, frame_shape)
+                        roi.update(hands_lm)
+                    tracer.record('inference', time.perf_counter() - submitted)
+                    self.processed += 1
+                future.set_result(hands_lm)
+            except Exception as e:
+                future.set_exception(e)
+        return done
+
+    def _release(self, frame):
+        if self.frame_pool is not None:
+            self.frame_pool.release(frame)
@@ -0,0 +1,134 @@
+'''
+Hand inference backends used by inference.py (tracker) and process_pipeline.py
+    solutions     legacy mp.solutions.hands.Hands, synchronous, model complexity 0 (lite) / 1 (full)
+    video         MediaPipe Tasks HandLandmarker, VIDEO mode - synchronous, timestamped so tracking carries across frames
+    live_stream   MediaPipe Tasks HandLandmarker, LIVE_STREAM mode - detect_async returns straight away and results
+                  come back on mediapipe's own thread, so capture / conversion of the next frame overlaps inference
+Every backend takes RGB frames and gives landmarks as a list of (hand_label, (21, 3) array), like gestures.extract_hands
+submit(rgb, timestamp, done) calls done(hands_lm) once a frame is processed - live_stream may skip frames while busy,
+in which case done(None) is called for them
+Pick the fastest backend per device with: python benchmarks/bench_inference.py --session session.npz
+'''
+
+import threading
+import numpy as np
+from config import INFERENCE
+from gestures import extract_hands
+
+
+class SolutionsBackend:
+    """Legacy mediapipe solution (one instance per thread - not thread safe)"""
+
+    def __init__(self, complexity=1, max_hands=INFERENCE['max_hands']):
+        import mediapipe as mp
+        self.hands = mp.solutions.hands.Hands(
+            static_image_mode=False,
+            max_num_hands=max_hands,
+            model_complexity=complexity,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+        )
+
+    def process(self, rgb, timestamp):
+        return extract_hands(self.hands.process(rgb))
+
+    def submit(self, rgb, timestamp, done):
+        done(self.process(rgb, timestamp))
+
+    def close(self):
+        self.hands.close()
+
+
+def tasks_hands(result):
+    """Convert a HandLandmarkerResult into a list of (hand_label, landmark array)"""
+    hands = []
+    for landmarks, handedness in zip(result.hand_landmarks, result.handedness):
+        # camera image is mirrored, so mediapipe's "Left" is the user's right hand
+        hand_label = 'R' if handedness[0].category_name == "Left" else 'L'
+        hands.append((hand_label, np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)))
+    return hands
+
+
+class TasksBackend:
+    """MediaPipe Tasks HandLandmarker in VIDEO (synchronous) or LIVE_STREAM (asynchronous callback) mode"""
+
+    def __init__(self, mode='video', model=INFERENCE['model'], max_hands=INFERENCE['max_hands']):
+        import mediapipe as mp
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python.vision import HandLandmarker, HandLandmarkerOptions, RunningMode
+        self.mp = mp
+        self.live = mode == 'live_stream'
+        self.last_ms = -1
+        self._pending = {}          # timestamp ms -> done callback, oldest first
+        self._lock = threading.Lock()
+        options = HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model, delegate=BaseOptions.Delegate.CPU),
+            running_mode=RunningMode.LIVE_STREAM if self.live else RunningMode.VIDEO,
+            num_hands=max_hands,
+            min_hand_detection_confidence=0.5,
+            min_hand_presence_confidence=0.5,
+            min_tracking_confidence=0.5,
+            result_callback=self._result if self.live else None,
+        )
+        self.landmarker = HandLandmarker.create_from_options(options)
+
+    def _timestamp_ms(self, timestamp):
+        # tasks need strictly increasing integer milliseconds
+        self.last_ms = max(int(timestamp * 1000), self.last_ms + 1)
+        return self.last_ms
+
+    def _image(self, rgb):
+        return self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=rgb)
+
+    def process(self, rgb, timestamp):
+        if self.live:
+            raise RuntimeError("live_stream backend only supports submit()")
+        return tasks_hands(self.landmarker.detect_for_video(self._image(rgb), self._timestamp_ms(timestamp)))
+
+    def submit(self, rgb, timestamp, done):
+        if not self.live:
+            done(self.process(rgb, timestamp))
+            return
+        timestamp_ms = self._timestamp_ms(timestamp)
+        with self._lock:
+            self._pending[timestamp_ms] = done
+        self.landmarker.detect_async(self._image(rgb), timestamp_ms)
+
+    def _result(self, result, image, timestamp_ms):
+        """LIVE_STREAM callback (mediapipe thread) - frames older than this one were skipped by the graph"""
+        with self._lock:
+            skipped = [ms for ms in self._pending if ms < timestamp_ms]
+            callbacks = [self._pending.pop(ms) for ms in skipped]
+            done = self._pending.pop(timestamp_ms, None)
+        for callback in callbacks:
+            callback(None)
+        if done is not None:
+            done(tasks_hands(result))
+
+    def close(self):
+        # close flushes the graph, so callbacks for frames still in flight run before it returns
+        self.landmarker.close()
+        with self._lock:
+            callbacks = list(self._pending.values())
+            self._pending.clear()
+        for callback in callbacks:
+            callback(None)
+
+
+BACKENDS = {
+    'solutions': lambda complexity: SolutionsBackend(complexity),
+    'video': lambda complexity: TasksBackend('video'),
+    'live_stream': lambda complexity: TasksBackend('live_stream'),
+}
+
+
+def in_flight(name=INFERENCE['backend']):
+    """Frames one worker of this backend can have in inference at once"""
+    return INFERENCE['in_flight'] if name == 'live_stream' else 1
+
+
+def create_backend(name=INFERENCE['backend'], complexity=1):
+    """Inference backend by name - complexity only applies to the legacy solution (tasks ship one model)"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name}")
+    return BACKENDS[name](complexity)
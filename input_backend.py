@@ -0,0 +1,304 @@
+'''
+Mouse / keyboard backends used by control_machine.py
+Libraries are imported when a backend is created (not at import) so the controller can run headless with the
+recording backend, e.g. when replaying sessions on a build box
+Keys are given by name: 'ctrl', 'shift', 'tab', 'up'
+    pynput       real input on any OS
+    uinput       Linux only - virtual devices via evdev, each action is one write() of a whole event group
+    uinput_fake  uinput event encoding into in-memory devices (no /dev/uinput needed)
+    recording    fake that logs actions (replay / benchmarks)
+With INPUT['stats'] each action's injection time is recorded as a tracer span (inject_move, inject_click, ...)
+'''
+
+import os
+import struct
+import time
+from tracing import tracer
+
+
+class PynputBackend:
+    """Real mouse / keyboard via pynput (mission control as a ctrl+up chord)"""
+
+    def __init__(self):
+        from pynput.mouse import Controller as MouseController, Button
+        from pynput.keyboard import Controller as KeyboardController, Key
+        self.mouse = MouseController()
+        self.keyboard = KeyboardController()
+        self.button = Button
+        self.key = Key
+
+    @property
+    def position(self):
+        return self.mouse.position
+
+    def move(self, x, y):
+        self.mouse.position = (x, y)
+
+    def click(self):
+        self.mouse.click(self.button.left)
+
+    def move_relative(self, dx, dy):
+        self.mouse.move(dx, dy)
+
+    def scroll(self, dy):
+        self.mouse.scroll(dx=0, dy=dy)
+
+    def hotkey(self, *keys):
+        """Hold modifier keys in order, tap the last key, then release"""
+        *modifiers, key = [getattr(self.key, name) for name in keys]
+        for modifier in modifiers:
+            self.keyboard.press(modifier)
+        try:
+            self.keyboard.press(key)
+            self.keyboard.release(key)
+        finally:
+            for modifier in reversed(modifiers):
+                self.keyboard.release(modifier)
+
+    def mission_control(self):
+        # pynput rather than pyautogui, whose PAUSE sleeps 100ms after every call and stalls the event loop
+        self.hotkey('ctrl', 'up')
+
+
+# linux/input-event-codes.h (stable kernel ABI) - kept here so the fake devices work without evdev installed
+EV_SYN, EV_KEY, EV_REL, EV_ABS = 0x00, 0x01, 0x02, 0x03
+SYN_REPORT = 0
+REL_X, REL_Y, REL_WHEEL, REL_WHEEL_HI_RES = 0x00, 0x01, 0x08, 0x0b
+ABS_X, ABS_Y = 0x00, 0x01
+ABS_MAX = 32767             # absolute axis range, as used by virtual tablets
+BTN_LEFT, BTN_RIGHT, BTN_MIDDLE = 0x110, 0x111, 0x112
+KEYS = {
+    'esc': 1, 'tab': 15, 'enter': 28, 'ctrl': 29, 'shift': 42, 'alt': 56, 'space': 57, 'cmd': 125,
+    'up': 103, 'left': 105, 'right': 106, 'down': 108,
+}
+
+# struct input_event: timeval (ignored by uinput, left at 0), type, code, value
+EVENT = struct.Struct('llHHi')
+SYN = (EV_SYN, SYN_REPORT, 0)
+
+
+def encode_frames(*frames):
+    """Pack event groups into one buffer, each group closed by a single SYN_REPORT"""
+    events = [event for frame in frames for event in (*frame, SYN)]
+    data = bytearray(EVENT.size * len(events))
+    for i, (kind, code, value) in enumerate(events):
+        EVENT.pack_into(data, i * EVENT.size, 0, 0, kind, code, value)
+    return data
+
+
+def decode_frames(data):
+    """Split a buffer written to a uinput device back into event groups (without the SYN_REPORTs)"""
+    frames, frame = [], []
+    for _, _, kind, code, value in EVENT.iter_unpack(data):
+        if (kind, code) == (EV_SYN, SYN_REPORT):
+            frames.append(frame)
+            frame = []
+        else:
+            frame.append((kind, code, value))
+    return frames
+
+
+class UinputDevice:
+    """Virtual input device created through evdev - write() hands a whole buffer of events to the kernel at once"""
+
+    def __init__(self, name, capabilities):
+        from evdev import UInput, AbsInfo
+        events = {kind: [(code, AbsInfo(value=0, min=low, max=high, fuzz=0, flat=0, resolution=0))
+                         for code, low, high in codes] if kind == EV_ABS else codes
+                  for kind, codes in capabilities.items()}
+        self.ui = UInput(events, name=name)
+
+    def write(self, data):
+        os.write(self.ui.fd, data)
+
+    def close(self):
+        self.ui.close()
+
+
+class MemoryDevice:
+    """In-memory stand-in for UinputDevice that keeps every event group written to it (for tests)"""
+
+    def __init__(self, name, capabilities):
+        self.name = name
+        self.capabilities = capabilities
+        self.frames = []
+        self.writes = 0
+
+    def write(self, data):
+        self.frames.extend(decode_frames(data))
+        self.writes += 1
+
+    def close(self):
+        pass
+
+
+class UinputBackend:
+    """
+    Linux mouse / keyboard through uinput (evdev) - no X11 / Wayland client library in the path
+    Each action is encoded as complete event groups and written with a single syscall
+    Three devices: an absolute pointer (like a VM tablet - ABS_X / ABS_Y, buttons, wheel), a relative mouse and a keyboard
+    """
+
+    def __init__(self, desktop=(0, 0, 1920, 1080), device=UinputDevice, settle=0.2):
+        # absolute axes span the whole desktop (all monitors) - the compositor scales them to its layout
+        self.pointer = device("hand-tracking pointer", {
+            EV_KEY: [BTN_LEFT, BTN_RIGHT, BTN_MIDDLE],
+            EV_REL: [REL_WHEEL, REL_WHEEL_HI_RES],
+            EV_ABS: [(ABS_X, 0, ABS_MAX), (ABS_Y, 0, ABS_MAX)],
+        })
+        self.mouse = device("hand-tracking mouse", {EV_KEY: [BTN_LEFT, BTN_RIGHT, BTN_MIDDLE], EV_REL: [REL_X, REL_Y]})
+        self.keyboard = device("hand-tracking keyboard", {EV_KEY: sorted(KEYS.values())})
+        self.set_desktop(*desktop)
+        x, y, width, height = desktop
+        self._position = (x + width // 2, y + height // 2)   # uinput can't read the cursor back - last position written
+        self.writes = 0
+        if device is UinputDevice:
+            # give udev / the compositor time to pick up the new devices before the first event
+            time.sleep(settle)
+
+    def _emit(self, device, *frames):
+        device.write(encode_frames(*frames))
+        self.writes += 1
+
+    @property
+    def position(self):
+        return self._position
+
+    def set_desktop(self, x, y, width, height):
+        """Desktop bounding box (all monitors) that the absolute axes cover"""
+        self.origin = (x, y)
+        self.scale = (ABS_MAX / max(width - 1, 1), ABS_MAX / max(height - 1, 1))
+
+    def move(self, x, y):
+        ax = int((x - self.origin[0]) * self.scale[0] + 0.5)
+        ay = int((y - self.origin[1]) * self.scale[1] + 0.5)
+        self._emit(self.pointer, [(EV_ABS, ABS_X, ax), (EV_ABS, ABS_Y, ay)])
+        self._position = (x, y)
+
+    def move_relative(self, dx, dy):
+        self._emit(self.mouse, [(EV_REL, REL_X, dx), (EV_REL, REL_Y, dy)])
+        self._position = (self._position[0] + dx, self._position[1] + dy)
+
+    def click(self):
+        # press and release in separate groups, so the click isn't collapsed into a single report
+        self._emit(self.pointer, [(EV_KEY, BTN_LEFT, 1)], [(EV_KEY, BTN_LEFT, 0)])
+
+    def scroll(self, dy):
+        # hi-res wheel (120 per notch) alongside the classic wheel for libinput
+        self._emit(self.pointer, [(EV_REL, REL_WHEEL, dy), (EV_REL, REL_WHEEL_HI_RES, dy * 120)])
+
+    def hotkey(self, *keys):
+        """Whole chord in one write: all keys down in one group, released in reverse order in the next"""
+        codes = [KEYS[name] for name in keys]
+        self._emit(self.keyboard, [(EV_KEY, code, 1) for code in codes],
+                   [(EV_KEY, code, 0) for code in reversed(codes)])
+
+    def mission_control(self):
+        self.hotkey('ctrl', 'up')
+
+    def close(self):
+        for device in (self.pointer, self.mouse, self.keyboard):
+            device.close()
+
+
+class RecordingBackend:
+    """Fake backend that records every action instead of touching the OS (for replay / benchmarks)"""
+
+    def __init__(self, position=(0, 0), clock=time.time):
+        self._position = position
+        self.clock = clock
+        self.events = []            # (time, action, args)
+
+    def _record(self, action, *args):
+        self.events.append((self.clock(), action, args))
+
+    @property
+    def position(self):
+        return self._position
+
+    def move(self, x, y):
+        self._position = (x, y)
+        self._record('move', x, y)
+
+    def move_relative(self, dx, dy):
+        self._position = (self._position[0] + dx, self._position[1] + dy)
+        self._record('move_relative', dx, dy)
+
+    def click(self):
+        self._record('click')
+
+    def scroll(self, dy):
+        self._record('scroll', dy)
+
+    def hotkey(self, *keys):
+        self._record('hotkey', *keys)
+
+    def mission_control(self):
+        self._record('hotkey', 'ctrl', 'up')
+
+    def counts(self):
+        """Number of events per action"""
+        counts = {}
+        for _, action, _ in self.events:
+            counts[action] = counts.get(action, 0) + 1
+        return counts
+
+
+class TimedBackend:
+    """Wraps a backend and records each action's injection time as a tracer span (inject_<action>)"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _timed(self, action, method, *args):
+        start = time.perf_counter()
+        try:
+            method(*args)
+        finally:
+            tracer.since(action, start)
+
+    @property
+    def position(self):
+        return self.backend.position
+
+    def move(self, x, y):
+        self._timed('inject_move', self.backend.move, x, y)
+
+    def move_relative(self, dx, dy):
+        self._timed('inject_move', self.backend.move_relative, dx, dy)
+
+    def click(self):
+        self._timed('inject_click', self.backend.click)
+
+    def scroll(self, dy):
+        self._timed('inject_scroll', self.backend.scroll, dy)
+
+    def hotkey(self, *keys):
+        self._timed('inject_hotkey', self.backend.hotkey, *keys)
+
+    def mission_control(self):
+        self._timed('inject_hotkey', self.backend.mission_control)
+
+    def set_desktop(self, x, y, width, height):
+        if hasattr(self.backend, 'set_desktop'):
+            self.backend.set_desktop(x, y, width, height)
+
+    def close(self):
+        if hasattr(self.backend, 'close'):
+            self.backend.close()
+
+
+BACKENDS = {
+    'pynput': lambda desktop: PynputBackend(),
+    'uinput': lambda desktop: UinputBackend(desktop),
+    'uinput_fake': lambda desktop: UinputBackend(desktop, device=MemoryDevice),
+    'recording': lambda desktop: RecordingBackend(),
+}
+
+
+def create_backend(name, desktop=(0, 0, 1920, 1080), timed=False):
+    """Backend by name, desktop = (x, y, width, height) for absolute uinput coordinates, timed = wrap in TimedBackend"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend: {name}")
+    backend = BACKENDS[name](desktop)
+    return TimedBackend(backend) if timed else backend
@@ -3,9 +3,12 @@ Script for running both the camera tracking and machine controller scripts async
 Call this script when running the app from a single machine - ie RUN_MODE = async
 """
 
+from startup_profile import profiler      # first, so interpreter + import time is profiled
 import asyncio
 import hand_tracking_v2, control_machine
-import time
+from channels import PacketQueue
+from tracing import tracer
+from config import STARTUP
 
 async def run_scripts():
     """Simultaneously call 2 scripts"""
@@ -13,7 +16,11 @@ async def run_scripts():
     
     try:
         # Create shared queue for async communication
-        data_queue = asyncio.Queue()
+        # commands jump ahead of movement, only the latest cursor / scroll packet is kept
+        data_queue = PacketQueue()
+
+        # both scripts share this process's tracer - one dump covers capture to injection
+        tracer.start_reporter("main")
         
         # Create and run tasks
         tracking_task = asyncio.create_task(hand_tracking_v2.main(data_queue))
@@ -25,23 +32,13 @@ async def run_scripts():
     except Exception as e:
         print(f"Error in main script: {e}")
     finally:
+        tracer.close("main")
         print("Shutting down...")
 
 if __name__ == "__main__":
-    # Test mouse control at startup
-    print("Testing mouse controller...")
-    mouse = control_machine.MouseController()
-    try:
-        original_pos = mouse.position
-        print(f"Original position: {original_pos}")
-        test_pos = (100, 100)
-        mouse.position = test_pos
-        print(f"Moved to test position: {test_pos}")
-        time.sleep(1)
-        mouse.position = original_pos
-        print("Mouse controller test successful")
-    except Exception as e:
-        print(f"Mouse controller test failed: {e}")
-        
+    # Test mouse control at startup (moves the real cursor - off by default)
+    if STARTUP['mouse_test']:
+        control_machine.mouse_test()
+
     # Run the main script
-    asyncio.run(run_scripts())
\ No newline at end of file
+    asyncio.run(run_scripts())
@@ -0,0 +1,83 @@
+'''
+Motion gate and idle mode for the tracker
+Each frame is shrunk to a tiny thumbnail and compared with the thumbnail of the last frame sent to inference - when
+the scene is static, mediapipe is skipped (with a forced refresh every 'refresh' seconds)
+While a command gesture is armed (held still, waiting for its hold time) the refresh drops to 'armed_refresh' seconds,
+so click / mission control still see the frames they need to fire
+After 'idle_after' seconds without a hand the tracker goes idle (lower capture FPS + resolution) and snaps back to
+full rate as soon as the gate sees motion
+All times are capture timestamps, so recorded sessions replay the same way
+'''
+
+import cv2
+import numpy as np
+from config import MOTION
+
+
+class MotionGate:
+    """Decides per frame whether inference is needed, and tracks idle state"""
+
+    def __init__(self, size=MOTION['size'], pixel_threshold=MOTION['pixel_threshold'], min_area=MOTION['min_area'],
+                 refresh=MOTION['refresh'], armed_refresh=MOTION['armed_refresh'], idle_after=MOTION['idle_after']):
+        self.size = size                            # thumbnail (width, height) used for the frame difference
+        self.pixel_threshold = pixel_threshold      # per pixel change (0-255) that counts as motion
+        self.min_area = min_area                    # fraction of thumbnail pixels that must change
+        self.refresh = refresh                      # run inference at least this often (seconds) even when static
+        self.armed_refresh = armed_refresh          # ... and this often while a gesture is mid-hold
+        self.idle_after = idle_after                # seconds without a hand before going idle
+        self.reference = None                       # thumbnail of last frame sent to inference
+        self.last_inference = None
+        self.last_active = None                     # capture time of last hand / motion
+        self.idle = False
+        self.processed = 0
+        self.skipped = 0
+        self.idle_frames = 0
+
+    def thumbnail(self, frame):
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def check(self, frame, timestamp, armed=False):
+        """True if frame should go to inference (scene changed, refresh due, or nothing to compare with)
+        armed = a gesture is mid-hold (see GestureStates.armed), refresh at armed_refresh instead"""
+        small = self.thumbnail(frame)
+        if self.last_active is None:
+            self.last_active = timestamp
+
+        if self.reference is None:
+            moved = True
+        else:
+            # max change over colour channels, so it works on BGR or RGB frames alike
+            changed = np.abs(small - self.reference).max(axis=2) > self.pixel_threshold
+            moved = changed.mean() > self.min_area
+
+        if moved:
+            self.wake(timestamp)
+        elif timestamp - self.last_inference < (self.armed_refresh if armed else self.refresh):
+            self.skipped += 1
+            if self.idle:
+                self.idle_frames += 1
+            return False
+
+        self.reference = small
+        self.last_inference = timestamp
+        self.processed += 1
+        if self.idle:
+            self.idle_frames += 1
+        return True
+
+    def hand_seen(self, timestamp, found):
+        """Inference result for the frame captured at timestamp - goes idle after idle_after seconds without a hand"""
+        if found:
+            self.wake(timestamp)
+        elif not self.idle and self.last_active is not None and timestamp - self.last_active > self.idle_after:
+            self.idle = True
+            print(f"Motion gate: no hand for {self.idle_after:.0f}s, going idle")
+
+    def wake(self, timestamp):
+        self.last_active = max(timestamp, self.last_active or timestamp)
+        if self.idle:
+            self.idle = False
+            print("Motion gate: motion detected, back to full rate")
+
+    def stats(self):
+        return {'processed': self.processed, 'skipped': self.skipped, 'idle_frames': self.idle_frames}
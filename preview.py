@@ -0,0 +1,191 @@
+'''
+Rate limited camera preview, kept off the capture path
+The capture loop offers every frame, but only one frame per 1 / PREVIEW['fps'] seconds is copied; drawing the
+landmark overlay, mirroring and showing / encoding happen on the preview thread
+    window   = OpenCV window (press q to quit) - on macOS HighGUI only works on the main thread, so the window is
+               shown from poll() in the capture loop at the preview rate instead
+    mjpeg    = low rate MJPEG stream over HTTP for a remote viewer (http://<host>:PREVIEW['port']/)
+    headless = no preview and no HighGUI calls at all
+'''
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+from config import PREVIEW
+from framepool import ScratchBuffer
+
+MODES = ('window', 'mjpeg', 'headless')
+WINDOW_NAME = "Hand Tracking"
+
+# mediapipe hand landmark connections (same as mp.solutions.hands.HAND_CONNECTIONS)
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),                 # thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),                 # index
+    (5, 9), (9, 10), (10, 11), (11, 12),            # middle
+    (9, 13), (13, 14), (14, 15), (15, 16),          # ring
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20) # little + palm
+)
+
+
+def resolve_mode(mode, run_mode):
+    """'auto' = window when running on the desktop, headless in serial mode (remote camera)"""
+    if mode == 'auto':
+        return 'headless' if run_mode == "serial" else 'window'
+    if mode not in MODES:
+        raise ValueError(f"Unknown preview mode: {mode}")
+    return mode
+
+
+def draw_landmarks(image, hands_lm, mirror=False):
+    """Draw landmark arrays (normalised to the frame) onto image in place"""
+    height, width = image.shape[:2]
+    for _, lm in hands_lm:
+        xs = (1 - lm[:, 0]) if mirror else lm[:, 0]
+        points = [(int(x * width), int(y * height)) for x, y in zip(xs.tolist(), lm[:, 1].tolist())]
+        for a, b in HAND_CONNECTIONS:
+            cv2.line(image, points[a], points[b], (255, 255, 255), 2)
+        for point in points:
+            cv2.circle(image, point, 3, (0, 0, 255), -1)
+
+
+class Preview:
+    """Preview thread fed by offer(), shown in a window or streamed as MJPEG"""
+
+    def __init__(self, mode, fps=PREVIEW['fps'], landmarks=PREVIEW['landmarks'], port=PREVIEW['port'],
+                 quality=PREVIEW['quality']):
+        self.mode = mode
+        self.interval = 1.0 / fps
+        self.landmarks = landmarks
+        self.port = port
+        self.quality = quality
+        self.quit = False               # set when q is pressed in the preview window
+        self.shown = 0
+        self._main_thread_window = mode == 'window' and sys.platform == 'darwin'
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._frame = ScratchBuffer()
+        self._shape = None              # shape of the waiting frame (None = nothing new)
+        self._hands = []
+        self._last_offer = 0.0
+        self._rendered = None           # latest rendered image (main thread window)
+        self._jpeg = None
+        self._jpeg_ready = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._server = None
+
+    def start(self):
+        if self.mode == 'headless' or self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="preview", daemon=True)
+        self._thread.start()
+        if self.mode == 'mjpeg':
+            self._server = ThreadingHTTPServer(('', self.port), self._handler())
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="preview-http", daemon=True).start()
+            print(f"Preview MJPEG stream on http://0.0.0.0:{self.port}/")
+
+    def offer(self, frame):
+        """Called for every captured frame - copies it only when the next preview frame is due"""
+        if not self._running:
+            return
+        now = time.perf_counter()
+        if now - self._last_offer < self.interval:
+            return
+        self._last_offer = now
+        with self._new_frame:
+            buffer = self._frame.get(frame.shape)
+            buffer[...] = frame
+            self._shape = frame.shape
+            self._new_frame.notify()
+
+    def set_landmarks(self, hands_lm):
+        """Latest landmarks for the overlay"""
+        self._hands = hands_lm
+
+    def poll(self):
+        """Show the latest rendered image from the calling (main) thread - only needed for windows on macOS"""
+        if not self._main_thread_window:
+            return
+        image, self._rendered = self._rendered, None
+        if image is not None:
+            self._show(image)
+
+    def close(self):
+        if not self._running:
+            return
+        self._running = False
+        with self._new_frame:
+            self._new_frame.notify()
+        self._thread.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self.mode == 'window':
+            cv2.destroyAllWindows()
+
+    def _run(self):
+        mirror = ScratchBuffer()
+        while True:
+            with self._new_frame:
+                while self._running and self._shape is None:
+                    self._new_frame.wait()
+                if not self._running:
+                    break
+                # mirror straight out of the shared buffer, so the capture loop can refill it
+                image = cv2.flip(self._frame.get(self._shape), 1, dst=mirror.get(self._shape))
+                self._shape = None
+
+            try:
+                if self.landmarks:
+                    draw_landmarks(image, self._hands, mirror=True)
+
+                if self.mode == 'mjpeg':
+                    ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                    if ok:
+                        with self._jpeg_ready:
+                            self._jpeg = jpeg.tobytes()
+                            self._jpeg_ready.notify_all()
+                elif self._main_thread_window:
+                    self._rendered = image.copy()
+                else:
+                    self._show(image)
+            except Exception as e:
+                print(f"Display error: {e}")
+
+    def _show(self, image):
+        cv2.imshow(WINDOW_NAME, image)
+        self.shown += 1
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            print("Quitting...")
+            self.quit = True
+
+    def _handler(self):
+        preview = self
+
+        class MjpegHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                try:
+                    while preview._running:
+                        with preview._jpeg_ready:
+                            preview._jpeg_ready.wait(timeout=1.0)
+                            jpeg = preview._jpeg
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n'
+                                         + f'Content-Length: {len(jpeg)}\r\n\r\n'.encode() + jpeg + b'\r\n')
+                        preview.shown += 1
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return MjpegHandler
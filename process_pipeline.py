@@ -0,0 +1,249 @@
+'''
+Multi-process version of the hand tracking pipeline (serial mode only - any TRANSPORT link)
+Capture, mediapipe inference and gesture/transmit each run in their own process so they can use separate cores
+Frames move between processes through a shared memory ring of preallocated RGB buffers - only slot indices are pickled
+Enable with PIPELINE['processes'] = True in config.py, then run hand_tracking_v2.py
+'''
+
+import multiprocessing as mproc
+from multiprocessing import shared_memory
+import queue
+import time
+import numpy as np
+from config import FRAME_SIZE, PIPELINE, PROTOCOL, MOTION, STARTUP, INFERENCE
+
+FRAME_SHAPE = (FRAME_SIZE['height'], FRAME_SIZE['width'], 3)
+STAGES = ('capture', 'inference', 'gesture')
+
+
+class SharedFrameRing:
+    """Fixed number of frame buffers in one shared memory block, indexed by slot"""
+
+    def __init__(self, slots, shape=FRAME_SHAPE, name=None):
+        self.slots = slots
+        self.shape = shape
+        size = slots * int(np.prod(shape))
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.frames = np.ndarray((slots, *shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def slot(self, index):
+        return self.frames[index]
+
+    def close(self):
+        del self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def capture_stage(ring_name, slots, free_slots, ready_slots, counter, dropped, stop_event, idle_event):
+    """
+    Read camera frames and convert them to RGB directly into free ring slots (at MOTION['idle_fps'] while idle)
+    Latest frame wins - ready frames inference hasn't picked up yet are handed back as drops before a new one is queued
+    """
+    import cv2
+
+    ring = SharedFrameRing(slots, name=ring_name)
+    cap = cv2.VideoCapture(0)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_SIZE['width'])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_SIZE['height'])
+    cap.set(cv2.CAP_PROP_FPS, 60)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # low latency
+
+    bgr = np.empty(FRAME_SHAPE, dtype=np.uint8)   # reused capture buffer
+
+    try:
+        while not stop_event.is_set():
+            if idle_event.is_set():
+                time.sleep(1 / MOTION['idle_fps'])
+            ret, frame = cap.read(bgr)
+            if not ret:
+                print("Failed to grab frame")
+                break
+            if frame.shape != FRAME_SHAPE:
+                # camera ignored the requested size - scale into the reusable buffer
+                frame = cv2.resize(frame, (FRAME_SIZE['width'], FRAME_SIZE['height']), dst=bgr)
+
+            # inference fell behind - take back frames it hasn't started on, so it never works through a stale backlog
+            stale = 0
+            while True:
+                try:
+                    item = ready_slots.get_nowait()
+                except queue.Empty:
+                    break
+                free_slots.put(item[0])
+                stale += 1
+            if stale:
+                with dropped.get_lock():
+                    dropped.value += stale
+
+            # wait for inference to hand back a slot (camera buffer size 1 means stale frames are dropped upstream)
+            try:
+                slot = free_slots.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=ring.slot(slot))
+            ready_slots.put((slot, time.time()))
+            with counter.get_lock():
+                counter.value += 1
+    finally:
+        ready_slots.put(None)
+        cap.release()
+        ring.close()
+
+
+def inference_stage(ring_name, slots, free_slots, ready_slots, landmark_queue, counter, skipped, idle_event,
+                    armed_event):
+    """Run mediapipe on frames from the ring (skipping static scenes) and forward landmark arrays"""
+    import threading
+    from inference_backends import create_backend
+    from motion_gate import MotionGate
+
+    ring = SharedFrameRing(slots, name=ring_name)
+    backend = create_backend(INFERENCE['backend'])
+    if STARTUP['warmup']:
+        # load the model on a blank frame while the capture process opens the camera
+        warmed = threading.Event()
+        backend.submit(np.zeros(FRAME_SHAPE, dtype=np.uint8), 0.0, lambda hands_lm: warmed.set())
+        if not warmed.wait(STARTUP['warmup_timeout']):
+            print(f"Inference warm-up gave no result after {STARTUP['warmup_timeout']}s, carrying on")
+    gate = MotionGate() if MOTION['enabled'] else None
+
+    def forward(timestamp):
+        """done(hands_lm) callback - live_stream backends call it from mediapipe's thread"""
+        def done(hands_lm):
+            if hands_lm is None:
+                # skipped by a busy live_stream backend
+                return
+            if gate is not None:
+                gate.hand_seen(timestamp, bool(hands_lm))
+                if gate.idle:
+                    idle_event.set()
+                else:
+                    idle_event.clear()
+
+            landmark_queue.put((timestamp, hands_lm))
+            with counter.get_lock():
+                counter.value += 1
+        return done
+
+    try:
+        while True:
+            item = ready_slots.get()
+            if item is None:
+                break
+            slot, timestamp = item
+
+            try:
+                if gate is not None and not gate.check(ring.slot(slot), timestamp, armed_event.is_set()):
+                    with skipped.get_lock():
+                        skipped.value += 1
+                    continue
+                backend.submit(ring.slot(slot), timestamp, forward(timestamp))
+            finally:
+                # mediapipe copies its input, so slot can be reused by capture straight away
+                free_slots.put(slot)
+    finally:
+        # close flushes frames still in a live_stream backend before the end marker
+        backend.close()
+        landmark_queue.put(None)
+        ring.close()
+
+
+def gesture_stage(landmark_queue, counter, armed_event):
+    """Classify gestures and send packets over the link to control_machine.py"""
+    from gestures import gesture_packets, GestureStates
+    from gesture_classifier import load_classifier
+    from transport import create_sender
+
+    link = create_sender()
+    print(f"Using protocol version {link.open(PROTOCOL['version'])}")
+    gesture_states = GestureStates()       # one command packet per gesture
+    classifier = load_classifier()
+
+    try:
+        while True:
+            item = landmark_queue.get()
+            if item is None:
+                break
+            timestamp, hands_lm = item
+
+            gesture_states.missing([hand_label for hand_label, _ in hands_lm], timestamp)
+            for hand_label, lm in hands_lm:
+                for packet in gesture_packets(hand_label, lm, timestamp, gesture_states, classifier):
+                    link.send(packet)
+            # tell the motion gate in the inference stage to keep frames coming while a gesture is mid-hold
+            armed = gesture_states.armed
+            if armed != armed_event.is_set():
+                armed_event.set() if armed else armed_event.clear()
+
+            with counter.get_lock():
+                counter.value += 1
+    finally:
+        link.close()
+
+
+def run():
+    """Start the 3 stage processes and report per-stage throughput until stopped"""
+
+    slots = PIPELINE['ring_slots']
+    ring = SharedFrameRing(slots)
+
+    free_slots = mproc.Queue()
+    for slot in range(slots):
+        free_slots.put(slot)
+    ready_slots = mproc.Queue()
+    landmark_queue = mproc.Queue(maxsize=slots)
+    stop_event = mproc.Event()
+    idle_event = mproc.Event()
+    armed_event = mproc.Event()         # a command gesture is mid-hold (gesture stage -> motion gate)
+    counters = {stage: mproc.Value('L', 0) for stage in STAGES}
+    skipped = mproc.Value('L', 0)       # frames the motion gate kept from mediapipe
+    dropped = mproc.Value('L', 0)       # ready frames replaced by a newer one before inference took them
+
+    processes = [
+        mproc.Process(target=capture_stage, name="capture",
+                      args=(ring.name, slots, free_slots, ready_slots, counters['capture'], dropped, stop_event,
+                            idle_event)),
+        mproc.Process(target=inference_stage, name="inference",
+                      args=(ring.name, slots, free_slots, ready_slots, landmark_queue, counters['inference'],
+                            skipped, idle_event, armed_event)),
+        mproc.Process(target=gesture_stage, name="gesture",
+                      args=(landmark_queue, counters['gesture'], armed_event)),
+    ]
+    for process in processes:
+        process.start()
+
+    print(f"Multi-process pipeline running ({slots} shared frame slots)")
+
+    # per-stage throughput counters
+    last = {stage: 0 for stage in STAGES}
+    last_time = time.time()
+    try:
+        while any(process.is_alive() for process in processes):
+            time.sleep(PIPELINE['report_every'])
+            now = time.time()
+            rates = []
+            for stage in STAGES:
+                value = counters[stage].value
+                rates.append(f"{stage}: {(value - last[stage]) / (now - last_time):.1f}/s")
+                last[stage] = value
+            last_time = now
+            rates.append(f"dropped: {dropped.value}")
+            rates.append(f"motion skipped: {skipped.value}" + (" (idle)" if idle_event.is_set() else ""))
+            print(" | ".join(rates))
+    except KeyboardInterrupt:
+        print("Quitting...")
+    finally:
+        stop_event.set()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        ring.close()
@@ -0,0 +1,223 @@
+'''
+Wire protocol shared by hand_tracking_v2.py (sender) and control_machine.py (receiver)
+Both sides work with Packet tuples - only serial links encode / decode them
+
+Version 1 (legacy, no padding) =
+2 bytes for command (1 char + newline)
+6 bytes for scroll (1 char + 2 int + newline)
+6 bytes for cursor movement (1 char + 2 int + newline)
+coordinates are integers 0->1000
+
+Version 2 = fixed 19 byte frames, little endian
+magic (0xA5) | version | kind char | seq (uint16) | capture timestamp (uint64 us) | 2 x coord (uint16) | CRC-16
+coordinates are integers 0->65535, CRC-16/CCITT covers every byte before it
+
+Frame length is fixed by the leading byte, so packed coordinates containing 0x0A never split a frame
+Version is negotiated on every connect: sender writes HELLO (max version), receiver replies ACK (agreed version)
+'''
+
+import binascii
+import struct
+import time
+from collections import namedtuple
+
+# kind = 1 byte char, a / b = normalised coordinates 0->1 (cursor: x, y | scroll: scroll loc, anchor loc)
+# seq + timestamp (capture time, seconds since epoch) are None when not known
+Packet = namedtuple('Packet', 'kind a b seq timestamp', defaults=(0.0, 0.0, None, None))
+
+COMMAND_KINDS = b'CEFBM'
+MOVEMENT_KINDS = b'SRL'
+HELLO = b'H'                # handshake kinds - a = protocol version
+ACK = b'A'
+
+PROTOCOL_VERSIONS = (1, 2)
+TERMINATOR = 0x0A
+READ_SIZE = 4096            # bytes requested per serial read
+
+# version 1
+V1_SCALE = 1000
+V1_LENGTHS = {**{kind: 2 for kind in COMMAND_KINDS}, **{kind: 6 for kind in MOVEMENT_KINDS}}
+V1_MOVEMENT = struct.Struct('=c2H')
+
+# version 2
+MAGIC = 0xA5
+V2_SCALE = 65535
+V2_BODY = struct.Struct('<BBcHQHH')
+V2_CRC = struct.Struct('<H')
+V2_LENGTH = V2_BODY.size + V2_CRC.size
+
+
+def _quantise(value, scale):
+    return int(max(0.0, min(1.0, value)) * scale + 0.5)
+
+
+def encode_v1(packet):
+    if packet.kind in MOVEMENT_KINDS:
+        return V1_MOVEMENT.pack(packet.kind, _quantise(packet.a, V1_SCALE), _quantise(packet.b, V1_SCALE)) + b'\n'
+    return packet.kind + b'\n'
+
+
+def encode_v2(packet, seq):
+    if packet.kind in (HELLO, ACK):
+        a, b = int(packet.a), 0
+    else:
+        a, b = _quantise(packet.a, V2_SCALE), _quantise(packet.b, V2_SCALE)
+    timestamp = int((packet.timestamp if packet.timestamp is not None else time.time()) * 1e6)
+    body = V2_BODY.pack(MAGIC, 2, packet.kind, seq, timestamp, a, b)
+    return body + V2_CRC.pack(binascii.crc_hqx(body, 0xFFFF))
+
+
+def decode_v1(frame):
+    if len(frame) == 6:
+        kind, a, b = V1_MOVEMENT.unpack(frame[:5])
+        return Packet(kind, a / V1_SCALE, b / V1_SCALE)
+    return Packet(bytes(frame[0:1]))
+
+
+def decode_v2(frame):
+    """Decode a 19 byte frame, returns None if version or CRC don't match"""
+    body = frame[:V2_BODY.size]
+    if V2_CRC.unpack(frame[V2_BODY.size:])[0] != binascii.crc_hqx(body, 0xFFFF):
+        return None
+    _, version, kind, seq, timestamp, a, b = V2_BODY.unpack(body)
+    if version != 2:
+        return None
+    if kind not in (HELLO, ACK):
+        a, b = a / V2_SCALE, b / V2_SCALE
+    return Packet(kind, a, b, seq, timestamp / 1e6)
+
+
+class Encoder:
+    """Encodes packets for the negotiated version, stamping sequence numbers"""
+
+    def __init__(self, version=2):
+        if version not in PROTOCOL_VERSIONS:
+            raise ValueError(f"Unsupported protocol version: {version}")
+        self.version = version
+        self.seq = 0
+
+    def encode(self, packet):
+        if self.version == 1:
+            return encode_v1(packet)
+        seq = self.seq
+        self.seq = (seq + 1) & 0xFFFF
+        return encode_v2(packet, seq)
+
+
+class LinkStats:
+    """Loss, reordering and latency from version 2 sequence numbers / capture timestamps"""
+
+    def __init__(self):
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.last_seq = None
+        self.last_latency = None    # seconds from capture to receipt (needs synced clocks across hosts)
+
+    def update(self, packet, now):
+        self.received += 1
+        if self.last_seq is not None:
+            gap = (packet.seq - self.last_seq) & 0xFFFF
+            if gap == 0 or gap > 0x8000:
+                # duplicate or older than the last packet seen
+                self.reordered += 1
+                return
+            self.lost += gap - 1
+        self.last_seq = packet.seq
+        self.last_latency = now - packet.timestamp
+
+    def stats(self):
+        return {'received': self.received, 'lost': self.lost, 'reordered': self.reordered,
+                'latency': self.last_latency}
+
+
+class PacketParser:
+    """
+    Streaming parser for version 1 and 2 frames (detected per frame from the leading byte)
+    Bytes are fed in bulk into a reusable bytearray; corrupt or unknown bytes are skipped one at a time until
+    a frame with a valid leading byte, terminator / CRC lines up again (resync)
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0             # complete frames decoded
+        self.discarded = 0          # bytes skipped while resyncing
+        self.resyncs = 0            # times the stream lost frame alignment
+        self.link = LinkStats()
+
+    def feed(self, data):
+        """Append received bytes and return list of decoded Packets"""
+        buffer = self.buffer
+        buffer += data
+
+        packets = []
+        pos = 0
+        end = len(buffer)
+        in_sync = True
+        now = time.time()
+        view = memoryview(buffer)
+        try:
+            while pos < end:
+                lead = buffer[pos]
+                length = V2_LENGTH if lead == MAGIC else V1_LENGTHS.get(lead)
+                if length is not None and pos + length > end:
+                    break       # wait for rest of frame
+
+                packet = None
+                if lead == MAGIC:
+                    packet = decode_v2(view[pos:pos + length])
+                elif length is not None and buffer[pos + length - 1] == TERMINATOR:
+                    packet = decode_v1(view[pos:pos + length])
+
+                if packet is None:
+                    # not a frame boundary - drop 1 byte and try again
+                    if in_sync:
+                        self.resyncs += 1
+                        in_sync = False
+                    self.discarded += 1
+                    pos += 1
+                    continue
+
+                if packet.seq is not None and packet.kind not in (HELLO, ACK):
+                    self.link.update(packet, now)
+                packets.append(packet)
+                pos += length
+                in_sync = True
+        finally:
+            view.release()
+
+        del buffer[:pos]
+        self.frames += len(packets)
+        return packets
+
+    def stats(self):
+        return {'frames': self.frames, 'discarded': self.discarded, 'resyncs': self.resyncs, **self.link.stats()}
+
+
+def hello(version):
+    """Handshake frame sent by the tracker when it connects"""
+    return encode_v2(Packet(HELLO, version), 0)
+
+
+def ack(version):
+    """Handshake reply from the controller with the agreed version"""
+    return encode_v2(Packet(ACK, version), 0)
+
+
+def negotiate(serial_port, version, timeout=1.0):
+    """
+    Tracker side handshake over a blocking serial port
+    Returns the version agreed by the controller, or 1 if it doesn't answer (legacy controller)
+    """
+    if version == 1:
+        return 1
+
+    parser = PacketParser()
+    serial_port.write(hello(version))
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        data = serial_port.read(serial_port.in_waiting or 1)
+        for packet in parser.feed(data):
+            if packet.kind == ACK and packet.a in PROTOCOL_VERSIONS:
+                return min(int(packet.a), version)
+    return 1
@@ -0,0 +1,110 @@
+'''
+Replay a recorded session (see session.py) through process_frame -> send_data -> process_data
+Runs as fast as possible with a RecordingBackend instead of the real mouse / keyboard, so it works headless and the
+recorded events are the same on every run - use it to reproduce behaviour and performance regressions
+Usage: python replay.py session.npz [--frames] [--events events.json]
+'''
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import hand_tracking_v2
+import control_machine
+from channels import LatestChannel
+from gestures import GestureStates
+from input_backend import RecordingBackend
+from session import Session, ReplayCamera
+from tracing import tracer
+from startup_profile import profiler
+from gesture_classifier import load_classifier
+
+
+async def replay(session, use_frames=False):
+    """Drive a session through the tracker and controller coroutines, returns the backend holding recorded events"""
+
+    # events are stamped with their order rather than wall time so runs can be compared directly
+    backend = RecordingBackend(clock=itertools.count().__next__)
+    control_machine.backend = backend
+    control_machine.motion = control_machine.CursorMotion(immediate=True)
+    control_machine.last_click = 0
+    control_machine.scroll_anchor = None
+    control_machine.last_filtered = None
+
+    # recorded capture timestamps are in the past, so latency spans (and governor decisions) would be meaningless
+    tracer.enabled = False
+    profiler.enabled = False
+    hand_tracking_v2.governor = None
+    hand_tracking_v2.gesture_states = GestureStates()
+    hand_tracking_v2.classifier = load_classifier()
+    control_machine.init_screen_map()
+
+    # blocking channels + plain queue - nothing is dropped or coalesced, every recorded frame is processed
+    landmark_queue = LatestChannel(maxsize=1, policy='block', name="landmark")
+    data_queue = asyncio.Queue()
+
+    controller = asyncio.create_task(control_machine.process_data(data_queue, [0, 0]))
+    sender = asyncio.create_task(hand_tracking_v2.send_data(landmark_queue, data_queue, None))
+
+    if use_frames:
+        # full path including mediapipe inference on the recorded frames
+        frame_queue = LatestChannel(maxsize=1, policy='block', name="frame")
+        hand_tracking_v2.inference_pool.start()
+        tracker = asyncio.create_task(hand_tracking_v2.process_frame(frame_queue, landmark_queue))
+
+        camera = ReplayCamera(session)
+        for timestamp in session.frame_timestamps:
+            ret, frame = camera.read()
+            if not ret:
+                break
+            await frame_queue.put((float(timestamp), frame))
+        await frame_queue.put(None)
+        await tracker
+        hand_tracking_v2.inference_pool.close()
+    else:
+        # landmarks only - skips capture and inference
+        for item in session.hands():
+            await landmark_queue.put(item)
+        await landmark_queue.put(None)
+
+    await sender
+
+    # let controller finish the queued packets, then stop it
+    while not data_queue.empty() and not controller.done():
+        await asyncio.sleep(0)
+    controller.cancel()
+    try:
+        await controller
+    except asyncio.CancelledError:
+        pass
+
+    return backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded hand tracking session")
+    parser.add_argument('session', help="recorded .npz session")
+    parser.add_argument('--frames', action='store_true', help="run mediapipe on recorded frames instead of using recorded landmarks")
+    parser.add_argument('--events', help="write recorded mouse / keyboard events to this JSON file")
+    args = parser.parse_args()
+
+    session = Session(args.session)
+    if args.frames and not session.has_frames:
+        parser.error("session has no recorded frames")
+
+    start = time.perf_counter()
+    backend = asyncio.run(replay(session, use_frames=args.frames))
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {session.duration:.2f}s of recording in {elapsed:.2f}s "
+          f"({session.duration / max(elapsed, 1e-9):.1f}x real time)")
+    print(f"Events: {backend.counts()}")
+
+    if args.events:
+        with open(args.events, 'w') as f:
+            json.dump([[t, action, list(event_args)] for t, action, event_args in backend.events], f)
+
+
+if __name__ == "__main__":
+    main()
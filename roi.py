@@ -0,0 +1,88 @@
+'''
+Region of interest tracking - crops each frame around the hand found in the previous frame before inference
+The crop is the previous landmark bounding box plus a margin that grows with hand speed, and is only moved when the
+hand gets close to its edge (stable crops let mediapipe keep tracking between frames)
+Landmarks found in the crop are remapped to full frame coordinates, and when the hand is lost the next frame is
+processed in full
+'''
+
+import numpy as np
+from config import ROI
+
+
+class RoiTracker:
+    """Per inference worker crop state (each mediapipe Hands instance tracks its own hand)"""
+
+    def __init__(self, margin=ROI['margin'], motion_gain=ROI['motion_gain'], min_size=ROI['min_size']):
+        self.margin = margin                # crop margin around hand, as a fraction of hand box size
+        self.motion_gain = motion_gain      # extra margin per unit of hand movement (box sizes per frame)
+        self.min_size = min_size            # smallest crop, as a fraction of frame size
+        self.box = None                     # normalised (x0, y0, x1, y1) of last detected hand
+        self.speed = 0.0
+        self.region = None                  # current crop in pixels (x0, y0, x1, y1)
+        self.cropped_frames = 0
+        self.full_frames = 0
+
+    def crop(self, frame):
+        """Return (crop view, region in pixels) - the full frame when no hand is being tracked"""
+        height, width = frame.shape[:2]
+        if self.box is None:
+            self.region = None
+            self.full_frames += 1
+            return frame, (0, 0, width, height)
+
+        x0, y0, x1, y1 = self.box
+        if self.region is None or not self._inside(x0 * width, y0 * height, x1 * width, y1 * height):
+            self.region = self._region(width, height)
+
+        self.cropped_frames += 1
+        rx0, ry0, rx1, ry1 = self.region
+        return frame[ry0:ry1, rx0:rx1], self.region
+
+    def _inside(self, x0, y0, x1, y1):
+        """True if hand box (pixels) still sits inside the current crop with some room to spare"""
+        rx0, ry0, rx1, ry1 = self.region
+        room = 0.25 * self.margin * max(x1 - x0, y1 - y0)
+        return x0 - room >= rx0 and y0 - room >= ry0 and x1 + room <= rx1 and y1 + room <= ry1
+
+    def _region(self, width, height):
+        """Crop around last hand box, margin scaled by hand speed, clamped to the frame"""
+        x0, y0, x1, y1 = self.box
+        size = max((x1 - x0) * width, (y1 - y0) * height)
+        half = size * (0.5 + self.margin + self.motion_gain * self.speed)
+        half = max(half, 0.5 * self.min_size * min(width, height))
+        cx, cy = (x0 + x1) / 2 * width, (y0 + y1) / 2 * height
+
+        rx0, rx1 = int(max(0, cx - half)), int(min(width, cx + half))
+        ry0, ry1 = int(max(0, cy - half)), int(min(height, cy + half))
+        return rx0, ry0, rx1, ry1
+
+    def remap(self, hands_lm, region, frame_shape):
+        """Convert landmarks normalised to the crop into landmarks normalised to the full frame (in place)"""
+        height, width = frame_shape[:2]
+        rx0, ry0, rx1, ry1 = region
+        if (rx0, ry0, rx1, ry1) == (0, 0, width, height):
+            return hands_lm
+        crop_w, crop_h = rx1 - rx0, ry1 - ry0
+        for _, lm in hands_lm:
+            lm[:, 0] = (lm[:, 0] * crop_w + rx0) / width
+            lm[:, 1] = (lm[:, 1] * crop_h + ry0) / height
+            lm[:, 2] *= crop_w / width          # mediapipe z uses the same scale as x
+        return hands_lm
+
+    def update(self, hands_lm):
+        """Track bounding box + speed of first hand, or fall back to full frame if it was lost"""
+        if not hands_lm:
+            self.box = None
+            self.speed = 0.0
+            return
+
+        xy = hands_lm[0][1][:, :2]
+        x0, y0 = xy.min(axis=0).tolist()
+        x1, y1 = xy.max(axis=0).tolist()
+        if self.box is not None:
+            # centre movement in box sizes per frame
+            px0, py0, px1, py1 = self.box
+            size = max(x1 - x0, y1 - y0, 1e-6)
+            self.speed = float(np.hypot((x0 + x1 - px0 - px1) / 2, (y0 + y1 - py0 - py1) / 2)) / size
+        self.box = (x0, y0, x1, y1)
@@ -0,0 +1,134 @@
+'''
+Maps normalised hand positions (0->1, see protocol.py) to virtual desktop pixels across every monitor
+Monitors are laid out as a strip across the hand's range (left -> right, or top -> bottom when stacked), each getting a
+share proportional to its physical size, so hand travel per inch of screen is the same on a 4K and a 1080p display
+All maths happens when the tables are built - a lookup is a quantise + 3 list indexes, whatever the layout
+Table entries are floats (sub-pixel) so the motion engine's glide isn't disturbed by rounding, it rounds when it moves
+Tables are rebuilt by watch() whenever the display layout changes (monitor plugged / unplugged / rearranged)
+'''
+
+import asyncio
+from collections import namedtuple
+import numpy as np
+from config import MAPPING, INPUT
+
+# one monitor in virtual desktop pixels, dpi = pixels per inch along its width
+Display = namedtuple('Display', 'name x y width height dpi primary')
+
+
+def display_dpi(monitor):
+    """MAPPING['dpi'] override by name, else the size the monitor reports, else MAPPING['default_dpi']"""
+    if monitor.name in MAPPING['dpi']:
+        return MAPPING['dpi'][monitor.name]
+    if getattr(monitor, 'width_mm', None):
+        return monitor.width / (monitor.width_mm / 25.4)
+    return MAPPING['default_dpi']
+
+
+def read_displays(which=MAPPING['monitors']):
+    """Current monitor layout (falls back to one INPUT['default_screen'] display when headless)"""
+    try:
+        from screeninfo import get_monitors
+        monitors = get_monitors()
+    except Exception:
+        monitors = []
+    if not monitors:
+        width, height = INPUT['default_screen']
+        return (Display('default', 0, 0, width, height, MAPPING['default_dpi'], True),)
+
+    displays = [Display(m.name, m.x, m.y, m.width, m.height, display_dpi(m), bool(m.is_primary)) for m in monitors]
+    if which == 'primary':
+        displays = [next((d for d in displays if d.primary), displays[0])]
+    return tuple(displays)
+
+
+def strip_axis(displays):
+    """0 if displays sit side by side, 1 if stacked, None if neither (e.g. a 2x2 grid)"""
+    for axis in (0, 1):
+        ordered = sorted(displays, key=lambda d: (d.x, d.y)[axis])
+        if all((a.x + a.width, a.y + a.height)[axis] <= (b.x, b.y)[axis] for a, b in zip(ordered, ordered[1:])):
+            return axis
+    return None
+
+
+def region_values(resolution, low, high):
+    """Table index -> position inside the active region (0->1), pinned to the edges outside it"""
+    return np.clip((np.linspace(0.0, 1.0, resolution) - low) / (high - low), 0.0, 1.0)
+
+
+class ScreenMap:
+    """Lookup tables from normalised (x, y) to virtual desktop pixels"""
+
+    def __init__(self, displays=None, region=MAPPING['region'], resolution=MAPPING['resolution']):
+        self.region = region
+        self.resolution = resolution
+        self.build(displays or read_displays())
+
+    def build(self, displays):
+        self.displays = displays
+        self.axis = strip_axis(displays) if len(displays) > 1 else 0
+        if self.axis is None:
+            # no clean strip - map over the bounding box of the desktop instead
+            self.axis = 0
+            displays = (Display('desktop', *self.desktop, MAPPING['default_dpi'], True),)
+        axis = self.axis
+        ordered = sorted(displays, key=lambda d: (d.x, d.y)[axis])
+
+        # along the strip: share of the hand's range per display, by physical size
+        inches = np.array([(d.width, d.height)[axis] / d.dpi for d in ordered])
+        bounds = np.concatenate(([0.0], np.cumsum(inches) / inches.sum()))
+        along = region_values(self.resolution, self.region[axis], self.region[axis + 2])
+        index = np.minimum(np.searchsorted(bounds, along, side='right') - 1, len(ordered) - 1)
+        local = (along - bounds[index]) / (bounds[index + 1] - bounds[index])
+        start = np.array([(d.x, d.y)[axis] for d in ordered])
+        size = np.array([(d.width, d.height)[axis] for d in ordered])
+        self._along = (start[index] + local * (size[index] - 1)).tolist()
+        # offset of each entry's display in the flattened across table
+        self._offset = (index * self.resolution).tolist()
+
+        # across the strip: full hand range onto each display's own extent, one block of entries per display
+        across = region_values(self.resolution, self.region[1 - axis], self.region[3 - axis])
+        self._across = np.concatenate([(d.y, d.x)[axis] + across * ((d.height, d.width)[axis] - 1)
+                                       for d in ordered]).tolist()
+        self._last = self.resolution - 1
+        self.lookup = self._lookup_stacked if axis else self._lookup_side_by_side
+
+    @property
+    def desktop(self):
+        """Bounding box of every display (x, y, width, height)"""
+        left = min(d.x for d in self.displays)
+        top = min(d.y for d in self.displays)
+        right = max(d.x + d.width for d in self.displays)
+        bottom = max(d.y + d.height for d in self.displays)
+        return left, top, right - left, bottom - top
+
+    # lookup(x, y) -> desktop position for normalised x, y, set by build() to the variant for the layout
+    def _lookup_side_by_side(self, x, y):
+        last = self._last
+        # clamp only when out of range (the filters already clamp, so this is the cold path)
+        if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+            x, y = min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+        i = int(x * last + 0.5)
+        return [self._along[i], self._across[self._offset[i] + int(y * last + 0.5)]]
+
+    def _lookup_stacked(self, x, y):
+        last = self._last
+        if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+            x, y = min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+        i = int(y * last + 0.5)
+        return [self._across[self._offset[i] + int(x * last + 0.5)], self._along[i]]
+
+    async def watch(self, on_change=None, interval=MAPPING['poll']):
+        """Rebuild the tables when the display layout changes, then call on_change(self)"""
+        if not interval:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            # monitor queries talk to the display server - keep them off the event loop
+            displays = await loop.run_in_executor(None, read_displays)
+            if displays != self.displays:
+                self.build(displays)
+                print(f"Display layout changed: {len(displays)} monitor(s), desktop {self.desktop}")
+                if on_change is not None:
+                    on_change(self)
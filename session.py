@@ -0,0 +1,120 @@
+'''
+Record and replay tracking sessions
+A session is a compressed .npz file holding landmark arrays and optionally the raw camera frames:
+    landmark_timestamps (N,)        capture time of each processed frame
+    landmarks (N, 21, 3) float32    normalised landmarks, NaN when no hand was detected
+    labels (N,)                     'R' / 'L' / '' (no hand)
+    frame_timestamps (M,)           optional - capture time of each raw frame
+    frames (M, H, W, 3) uint8       optional - BGR camera frames
+Set SESSION['record_path'] in config.py to record while running hand_tracking_v2.py, then use replay.py
+'''
+
+import time
+import numpy as np
+from gestures import NUM_LANDMARKS
+
+
+class SessionRecorder:
+    """Collects landmarks (and optionally frames) in memory and writes them to one .npz file on save"""
+
+    def __init__(self, path, frames=False):
+        self.path = path
+        self.record_frames = frames
+        self.frame_timestamps = []
+        self.frames = []
+        self.landmark_timestamps = []
+        self.landmarks = []
+        self.labels = []
+
+    def add_frame(self, timestamp, frame):
+        if self.record_frames:
+            self.frame_timestamps.append(timestamp)
+            self.frames.append(frame.copy())
+
+    def add_landmarks(self, timestamp, hands_lm):
+        """Store the first detected hand (trackers run with max_num_hands=1)"""
+        self.landmark_timestamps.append(timestamp)
+        if hands_lm:
+            hand_label, lm = hands_lm[0]
+            self.landmarks.append(lm)
+            self.labels.append(hand_label)
+        else:
+            self.landmarks.append(np.full((NUM_LANDMARKS, 3), np.nan, dtype=np.float32))
+            self.labels.append('')
+
+    def save(self):
+        arrays = {
+            'landmark_timestamps': np.array(self.landmark_timestamps, dtype=np.float64),
+            'landmarks': np.array(self.landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3),
+            'labels': np.array(self.labels, dtype='<U1'),
+        }
+        if self.record_frames and self.frames:
+            arrays['frame_timestamps'] = np.array(self.frame_timestamps, dtype=np.float64)
+            arrays['frames'] = np.stack(self.frames)
+        np.savez_compressed(self.path, **arrays)
+        print(f"Saved session to {self.path} ({len(self.landmarks)} landmark frames, {len(self.frames)} raw frames)")
+
+
+class Session:
+    """Recorded session loaded from disk"""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.landmark_timestamps = data['landmark_timestamps']
+            self.landmarks = data['landmarks']
+            self.labels = data['labels']
+            self.frame_timestamps = data['frame_timestamps'] if 'frame_timestamps' in data else None
+            self.frames = data['frames'] if 'frames' in data else None
+
+    @property
+    def has_frames(self):
+        return self.frames is not None and len(self.frames) > 0
+
+    @property
+    def duration(self):
+        timestamps = self.frame_timestamps if self.has_frames else self.landmark_timestamps
+        return float(timestamps[-1] - timestamps[0]) if len(timestamps) > 1 else 0.0
+
+    def hands(self):
+        """Iterate (timestamp, hands_lm) in the same format process_frame passes to send_data"""
+        for timestamp, lm, label in zip(self.landmark_timestamps, self.landmarks, self.labels):
+            hands_lm = [] if not label else [(str(label), lm)]
+            yield float(timestamp), hands_lm
+
+
+class ReplayCamera:
+    """Camera source with the same interface as cv2.VideoCapture, reading frames from a recorded session"""
+
+    def __init__(self, session, realtime=False):
+        self.session = session
+        self.realtime = realtime
+        self.index = 0
+        self._start = None
+
+    def isOpened(self):
+        return self.session.has_frames and self.index < len(self.session.frames)
+
+    def read(self, image=None):
+        if not self.isOpened():
+            return False, None
+        if self.realtime:
+            # pace frames at their recorded intervals
+            offset = self.session.frame_timestamps[self.index] - self.session.frame_timestamps[0]
+            if self._start is None:
+                self._start = time.time()
+            time.sleep(max(0.0, self._start + offset - time.time()))
+        frame = self.session.frames[self.index]
+        self.index += 1
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        self.index = len(self.session.frames) if self.session.has_frames else 0
@@ -0,0 +1,92 @@
+'''
+Startup profiler - time from process start to the first gesture, broken down by phase
+Phases (camera, link, mediapipe build / warm-up, backend ...) are timed with phase() / call(), several may overlap as
+heavy resources come up in parallel
+Milestones (main, first frame, first landmarks, first packet, first injection) are recorded the first time they happen,
+the final one prints the breakdown and dumps it to STARTUP['profile_path']
+Import this module first in entry scripts so interpreter + import time shows up as well
+'''
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config import STARTUP
+
+
+def process_age():
+    """Seconds since this process was started (Linux /proc, 0 elsewhere)"""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupProfiler:
+    """Phase durations and milestones, in seconds since process start"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.origin = time.perf_counter() - process_age()
+        self.phases = {}            # name -> (start, duration)
+        self.milestones = {'interpreter': self.now()}     # interpreter up, before the heavy imports
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of startup work (safe to use from worker threads)"""
+        start = self.now()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = (start, self.now() - start)
+
+    def call(self, name, fn, *args):
+        """fn(*args) timed as a phase - e.g. asyncio.to_thread(profiler.call, 'camera', open_camera)"""
+        with self.phase(name):
+            return fn(*args)
+
+    def milestone(self, name, role=None):
+        """Record the first time name happens - with role, this is the final milestone: report and dump"""
+        if name in self.milestones:
+            return
+        self.milestones[name] = self.now()
+        if role is not None and self.enabled and not self.reported:
+            self.reported = True
+            self.report(name)
+            if STARTUP['profile_path']:
+                self.dump(STARTUP['profile_path'].format(role=role))
+
+    def summary(self):
+        return {
+            'milestones': {name: round(t, 4) for name, t in self.milestones.items()},
+            'phases': {name: {'start': round(start, 4), 'duration': round(duration, 4)}
+                       for name, (start, duration) in self.phases.items()},
+        }
+
+    def report(self, final):
+        """Print milestones and phases in start order"""
+        print(f"Startup: {final} after {self.milestones[final]:.2f}s")
+        events = [(t, f"  {t:6.2f}s  {name}") for name, t in self.milestones.items()]
+        events += [(start, f"  {start:6.2f}s  {name:<24} {duration * 1000:8.1f}ms")
+                   for name, (start, duration) in self.phases.items()]
+        for _, line in sorted(events):
+            print(line)
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+# one profiler per process, shared by tracker and controller in async mode
+profiler = StartupProfiler(enabled=STARTUP['profile'])
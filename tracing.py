@@ -0,0 +1,118 @@
+'''
+Per-frame latency tracing from camera capture to OS input event
+Each stage records span durations into a rolling window; p50 / p95 / p99 are reported periodically and dumped to JSON
+Tracker spans: capture, convert, inference, classify, transmit
+Controller spans: link, queue_wait, dispatch, injection, end_to_end (+ inject_<action> per input backend call)
+link and end_to_end are measured from the capture timestamp carried in protocol v2 packets, so when the tracker and
+controller run on different hosts their clocks must be synced (e.g. NTP)
+'''
+
+import asyncio
+import json
+import time
+from collections import deque
+from config import TRACE
+
+PERCENTILES = (50, 95, 99)
+
+
+class SpanStats:
+    """Rolling window of span durations (seconds)"""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        """Percentiles in milliseconds over the current window"""
+        ordered = sorted(self.samples)
+        n = len(ordered)
+        result = {'count': self.count}
+        for p in PERCENTILES:
+            result[f"p{p}"] = round(ordered[min(n - 1, (n * p) // 100)] * 1000, 3)
+        result['max'] = round(ordered[-1] * 1000, 3)
+        return result
+
+
+class Tracer:
+    """Collects spans and gauges for one process (tracker, controller or both in async mode)"""
+
+    def __init__(self, window=1000, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.spans = {}
+        self.gauges = {}            # latest value of non-latency measurements (e.g. fps)
+        self._reporter = None
+        self._path = None
+        self._role = None
+
+    def record(self, span, seconds):
+        """Add one duration (seconds) to a span"""
+        if not self.enabled:
+            return
+        stats = self.spans.get(span)
+        if stats is None:
+            stats = self.spans[span] = SpanStats(self.window)
+        stats.add(seconds)
+
+    def since(self, span, start):
+        """Record duration from perf_counter start until now"""
+        if self.enabled:
+            self.record(span, time.perf_counter() - start)
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def summary(self):
+        return {
+            'time': time.time(),
+            'spans': {name: stats.summary() for name, stats in self.spans.items() if stats.samples},
+            'gauges': dict(self.gauges),
+        }
+
+    def report(self):
+        """Print one line per span"""
+        for name, stats in self.summary()['spans'].items():
+            print(f"{name:<12} n={stats['count']:<7} p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms "
+                  f"p99={stats['p99']:.2f}ms max={stats['max']:.2f}ms")
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def start_reporter(self, role):
+        """Start periodic report / dump task on the running loop (once per process)"""
+        if not self.enabled or self._reporter is not None:
+            return
+        self._role = role
+        self._path = TRACE['dump_path'].format(role=role) if TRACE['dump_path'] else None
+        if TRACE['report_every']:
+            self._reporter = asyncio.create_task(self._run_reporter())
+
+    def close(self, role):
+        """Stop reporter and write final dump (only if this role started it)"""
+        if role != self._role:
+            return
+        self._role = None
+        if self._reporter is not None:
+            self._reporter.cancel()
+            self._reporter = None
+        if self.enabled and self._path:
+            self.dump(self._path)
+            self._path = None
+
+    async def _run_reporter(self):
+        while True:
+            await asyncio.sleep(TRACE['report_every'])
+            if TRACE['print']:
+                self.report()
+            if self._path:
+                self.dump(self._path)
+
+
+# one tracer per process, shared by every stage
+tracer = Tracer(window=TRACE['window'], enabled=TRACE['enabled'])
@@ -0,0 +1,116 @@
+'''
+Train the learned gesture classifier (gesture_classifier.py) from recorded sessions (session.py)
+Label each session with the gesture held throughout it, and/or let the distance cascade label sessions frame by frame:
+    python train_classifier.py --session click=pinch.npz --session scroll=scroll.npz --cascade mixed.npz
+Then set CLASSIFIER['model'] = 'gesture_model.npz' in config.py
+'''
+
+import argparse
+import time
+import numpy as np
+from config import CLASSIFIER
+from gestures import cascade_ratios
+from gesture_classifier import CLASSES, CLASS_KINDS, landmark_features, train
+from session import Session
+
+KIND_NAMES = {kind: name for name, kind in CLASS_KINDS.items()}
+
+
+def cascade_label(lm):
+    """Class the distance cascade gives a hand (first command in cascade order wins)"""
+    scrolling, ratios = cascade_ratios(lm)
+    if scrolling:
+        return 'scroll'
+    for kind, ratio in ratios.items():
+        if ratio < 1.0:
+            return KIND_NAMES[kind]
+    return 'cursor'
+
+
+def load_examples(path, label=None):
+    """Feature vectors + class indices for every frame with a hand (label None = cascade labels)"""
+    features, labels, hands = [], [], []
+    for _, hands_lm in Session(path).hands():
+        for hand_label, lm in hands_lm:
+            features.append(landmark_features(lm, hand_label))
+            labels.append(CLASSES.index(label or cascade_label(lm)))
+            hands.append((hand_label, lm))
+    print(f"{path}: {len(labels)} hand frames ({label or 'cascade labels'})")
+    return features, labels, hands
+
+
+def confusion(classifier, features, labels):
+    predicted = classifier.probabilities(features).argmax(axis=1)
+    matrix = np.zeros((len(CLASSES), len(CLASSES)), dtype=int)
+    np.add.at(matrix, (labels, predicted), 1)
+    return matrix, float((predicted == labels).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the gesture classifier from recorded sessions")
+    parser.add_argument('--session', action='append', default=[], metavar='LABEL=PATH',
+                        help=f"session where one gesture is held throughout, LABEL in {', '.join(CLASSES)}")
+    parser.add_argument('--cascade', action='append', default=[], metavar='PATH',
+                        help="session labelled frame by frame with the distance cascade")
+    parser.add_argument('--out', default='gesture_model.npz', help="where to save the trained model")
+    parser.add_argument('--hidden', type=int, default=CLASSIFIER['hidden'], help="hidden layer size")
+    parser.add_argument('--epochs', type=int, default=500)
+    parser.add_argument('--val', type=float, default=0.2, help="fraction of frames held out for validation")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    features, labels, hands = [], [], []
+    for spec in args.session:
+        label, _, path = spec.partition('=')
+        if label not in CLASSES or not path:
+            parser.error(f"--session expects LABEL=PATH with LABEL in {', '.join(CLASSES)}, got {spec}")
+        f, l, h = load_examples(path, label)
+        features += f
+        labels += l
+        hands += h
+    for path in args.cascade:
+        f, l, h = load_examples(path)
+        features += f
+        labels += l
+        hands += h
+    if not labels:
+        parser.error("no training data - pass --session and/or --cascade")
+
+    features = np.array(features, dtype=np.float32)
+    labels = np.array(labels, dtype=np.intp)
+    print("Frames per class: " + ", ".join(f"{name} {n}" for name, n in zip(CLASSES, np.bincount(labels, minlength=len(CLASSES)))))
+
+    # random train / validation split
+    order = np.random.default_rng(args.seed).permutation(len(labels))
+    n_val = int(len(labels) * args.val)
+    val, fit = order[:n_val], order[n_val:]
+
+    start = time.perf_counter()
+    classifier = train(features[fit], labels[fit], hidden=args.hidden, epochs=args.epochs, seed=args.seed)
+    print(f"Trained in {time.perf_counter() - start:.1f}s")
+
+    _, accuracy = confusion(classifier, features[fit], labels[fit])
+    print(f"Train accuracy: {accuracy:.1%}")
+    if n_val:
+        matrix, accuracy = confusion(classifier, features[val], labels[val])
+        print(f"Validation accuracy: {accuracy:.1%} (rows = label, columns = predicted)")
+        width = max(len(name) for name in CLASSES)
+        print(" " * width + " ".join(f"{name[:6]:>6}" for name in CLASSES))
+        for name, row in zip(CLASSES, matrix):
+            print(f"{name:>{width}}" + " ".join(f"{n:>6}" for n in row))
+
+    # per frame inference cost, as the tracker calls it (features + forward pass for one hand)
+    hand_label, lm = hands[0]
+    timings = []
+    for _ in range(2000):
+        start = time.perf_counter()
+        classifier.ratios(lm, hand_label)
+        timings.append(time.perf_counter() - start)
+    print(f"Inference: p50 {np.percentile(timings, 50) * 1e6:.1f}us, p99 {np.percentile(timings, 99) * 1e6:.1f}us per hand")
+
+    classifier.save(args.out)
+    print(f"Saved model to {args.out} - set CLASSIFIER['model'] = '{args.out}' in config.py to use it")
+
+
+if __name__ == "__main__":
+    main()
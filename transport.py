@@ -0,0 +1,487 @@
+'''
+Links between the tracker (hand_tracking_v2.py / process_pipeline.py) and control_machine.py on separate machines
+TRANSPORT['type'] picks the link, both ends must use the same one:
+    serial = USB serial gadget (default)
+    udp    = every packet as its own datagram - nothing waits, lost or late movement is superseded by the next frame
+    tcp    = one reliable stream, reconnected automatically if the controller restarts or the network drops
+    hybrid = cursor / scroll over UDP (latest wins), commands over TCP (reliable)
+Tracker side senders are synchronous and never block on the network, controller side receivers run on asyncio
+Frames are the same on every link (protocol.py), so a tracker and controller can be tested over loopback
+'''
+
+import asyncio
+import errno
+import select
+import socket
+import time
+from collections import deque
+from config import TRANSPORT, PROTOCOL
+from protocol import (PacketParser, Encoder, negotiate, hello, ack, READ_SIZE, HELLO, ACK, COMMAND_KINDS,
+                      PROTOCOL_VERSIONS)
+from tracing import tracer
+
+TYPES = ('serial', 'udp', 'tcp', 'hybrid')
+
+
+########
+# tracker side
+
+class Handshake:
+    """
+    Non-blocking HELLO / ACK exchange on a freshly connected socket, polled from send()
+    HELLO goes out on the first poll and then every 'resend' seconds (None = once) until an ACK arrives
+    Gives up after 'timeout' seconds (None = never) - a controller that never answers only speaks version 1
+    """
+
+    def __init__(self, sock, version, resend=None, timeout=PROTOCOL['hello_timeout']):
+        self.sock = sock
+        self.offered = version
+        self.resend = resend
+        self.timeout = timeout
+        self.parser = PacketParser()
+        self.started = time.monotonic()
+        self._last_hello = None
+
+    def expired(self):
+        return self.timeout is not None and time.monotonic() - self.started >= self.timeout
+
+    def poll(self, write):
+        """Send HELLO through write(bytes) when due and read replies, returns the agreed version or None"""
+        now = time.monotonic()
+        if self._last_hello is None or (self.resend is not None and now - self._last_hello >= self.resend):
+            self._last_hello = now
+            write(hello(self.offered))
+        while True:
+            try:
+                data = self.sock.recv(READ_SIZE)
+            except BlockingIOError:
+                return None
+            if not data:
+                raise ConnectionResetError("closed by controller")
+            for packet in self.parser.feed(data):
+                if packet.kind == ACK and packet.a in PROTOCOL_VERSIONS:
+                    return min(int(packet.a), self.offered)
+
+
+class SerialSender:
+    """USB serial link (pyserial)"""
+
+    def __init__(self, port=TRANSPORT['serial_port'], baudrate=TRANSPORT['baudrate']):
+        self.port = port
+        self.baudrate = baudrate
+        self.serial = None
+        self.encoder = Encoder(1)
+        self.sent = 0
+
+    def open(self, version=PROTOCOL['version']):
+        """Open the port and agree protocol version with the controller, returns the version"""
+        import serial
+        self.serial = serial.Serial(self.port, self.baudrate, timeout=1)
+        self.encoder = Encoder(negotiate(self.serial, version, PROTOCOL['hello_timeout']))
+        return self.encoder.version
+
+    def send(self, packet):
+        self.serial.write(self.encoder.encode(packet))
+        self.sent += 1
+
+    def close(self):
+        if self.serial is not None:
+            self.serial.close()
+
+    def stats(self):
+        return {'sent': self.sent}
+
+
+class UdpSender:
+    """
+    Datagrams to the controller - a full socket buffer or unreachable controller drops the packet
+    Packets go out as version 1 until the controller answers HELLO (re-sent every PROTOCOL['hello_interval'] seconds),
+    so a controller started after the tracker still gets the better version
+    """
+
+    def __init__(self, host=TRANSPORT['host'], port=TRANSPORT['udp_port']):
+        self.address = (host, port)
+        self.sock = None
+        self.encoder = Encoder(1)
+        self._handshake = None
+        self.sent = 0
+        self.dropped = 0
+
+    def open(self, version=PROTOCOL['version'], wait=True):
+        """Offer version to the controller, wait = block up to PROTOCOL['hello_timeout'] for its answer
+        Returns the version in use now (send() upgrades it once an answer arrives)"""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect(self.address)
+        self.sock.setblocking(False)
+        self.encoder = Encoder(1)
+        if version > 1:
+            self._handshake = Handshake(self.sock, version, resend=PROTOCOL['hello_interval'], timeout=None)
+            self._poll_handshake()
+            if wait:
+                _wait_handshake(self)
+                if self._handshake is not None:
+                    print(f"UDP link to {self.address}: no answer to HELLO yet, sending version 1 until there is one")
+        return self.encoder.version
+
+    def _poll_handshake(self):
+        try:
+            version = self._handshake.poll(self.sock.send)
+        except OSError:
+            # nobody listening yet (ConnectionRefusedError) - HELLO goes out again after hello_interval
+            return
+        if version is not None:
+            self._handshake = None
+            self.encoder = Encoder(version)
+            print(f"UDP link to {self.address} using protocol version {version}")
+
+    def send(self, packet):
+        if self._handshake is not None:
+            self._poll_handshake()
+        try:
+            self.sock.send(self.encoder.encode(packet))
+            self.sent += 1
+        except OSError:
+            # BlockingIOError (buffer full) or ConnectionRefusedError (nobody listening yet)
+            self.dropped += 1
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+
+    def stats(self):
+        return {'sent': self.sent, 'dropped': self.dropped, 'version': self.encoder.version}
+
+
+class TcpSender:
+    """
+    Non-blocking TCP stream with automatic reconnect (at most one attempt per TRANSPORT['reconnect_delay'])
+    While disconnected, or while the controller isn't reading (TRANSPORT['max_pending'] bytes unsent - a dead link can
+    take minutes to be noticed), movement is dropped (it is stale by the time the link is back) and only the latest
+    TRANSPORT['backlog'] commands are kept, to be sent once the link drains
+    Every (re)connect starts with HELLO - frames go out as version 1 until the controller answers, or for good if it
+    doesn't within PROTOCOL['hello_timeout'] (the controller may have been swapped for an older one meanwhile)
+    """
+
+    def __init__(self, host=TRANSPORT['host'], port=TRANSPORT['tcp_port'],
+                 reconnect_delay=TRANSPORT['reconnect_delay'], backlog=TRANSPORT['backlog'],
+                 max_pending=TRANSPORT['max_pending']):
+        self.address = (host, port)
+        self.reconnect_delay = reconnect_delay
+        self.max_pending = max_pending
+        self.sock = None
+        self.connected = False
+        self.version = PROTOCOL['version']      # offered on every connect
+        self.encoder = Encoder(1)
+        self._handshake = None
+        self._buffer = bytearray()          # encoded bytes the socket hasn't accepted yet (up to max_pending)
+        self._backlog = deque(maxlen=backlog)   # commands waiting for the link, oldest dropped first (encoded on send)
+        self._last_attempt = 0.0
+        self.sent = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    def open(self, version=PROTOCOL['version']):
+        """Connect and agree protocol version - if the controller isn't up yet, retry (and handshake) later
+        Returns the version in use now"""
+        self.version = version
+        try:
+            sock = socket.create_connection(self.address, timeout=PROTOCOL['hello_timeout'])
+        except OSError as e:
+            print(f"TCP link to {self.address} not up yet ({e}), retrying in the background")
+            self._last_attempt = time.monotonic()
+            return self.encoder.version
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._connected(sock)
+        self.flush()
+        _wait_handshake(self)
+        return self.encoder.version
+
+    def _connected(self, sock):
+        sock.setblocking(False)
+        self.sock = sock
+        self.connected = True
+        self._buffer.clear()
+        print(f"TCP link to {self.address} connected")
+        self.encoder = Encoder(1)
+        if self.version > 1:
+            self._handshake = Handshake(sock, self.version)
+            self._poll_handshake()
+
+    def _poll_handshake(self):
+        try:
+            version = self._handshake.poll(self._buffer.extend)
+        except OSError as e:
+            self._disconnect(e)
+            return
+        if version is None and self._handshake.expired():
+            print(f"TCP link to {self.address}: no answer to HELLO, using protocol version 1")
+            version = 1
+        if version is not None:
+            self._handshake = None
+            self.encoder = Encoder(version)
+            print(f"TCP link to {self.address} using protocol version {version}")
+
+    def _disconnect(self, reason):
+        if self.connected:
+            print(f"TCP link to {self.address} lost ({reason}), reconnecting")
+        if self.sock is not None:
+            self.sock.close()
+        self.sock = None
+        self.connected = False
+        self._handshake = None
+        self._buffer.clear()
+        self._last_attempt = time.monotonic()
+
+    def _poll_connect(self):
+        """Advance a non-blocking reconnect, never waits"""
+        if self.sock is None:
+            if time.monotonic() - self._last_attempt < self.reconnect_delay:
+                return
+            self._last_attempt = time.monotonic()
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.setblocking(False)
+            result = self.sock.connect_ex(self.address)
+            if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                self._disconnect(errno.errorcode.get(result, result))
+                return
+
+        # connection in progress - done once the socket is writable
+        _, writable, _ = select.select([], [self.sock], [], 0)
+        if not writable:
+            return
+        error = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            self._disconnect(errno.errorcode.get(error, error))
+            return
+        self.reconnects += 1
+        self._connected(self.sock)
+        if self.connected:
+            self.flush()
+
+    def poll(self):
+        """Advance reconnect / handshake and write pending bytes, never blocks"""
+        if self.connected and self._handshake is not None:
+            self._poll_handshake()
+        if self.connected:
+            self.flush()
+        else:
+            self._poll_connect()
+
+    def send(self, packet):
+        # make room first, so backlogged commands go out before this packet (and in the agreed version)
+        self.poll()
+        if not self.connected or len(self._buffer) >= self.max_pending:
+            if packet.kind in COMMAND_KINDS:
+                self._backlog.append(packet)
+            else:
+                self.dropped += 1
+            return
+        self._buffer += self.encoder.encode(packet)
+        self.sent += 1
+        self.flush()
+
+    def flush(self):
+        """Write as much of the pending bytes as the socket takes without blocking"""
+        if self._buffer:
+            try:
+                written = self.sock.send(self._buffer)
+                del self._buffer[:written]
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                self._disconnect(e)
+                return
+        while self._backlog and len(self._buffer) < self.max_pending:
+            self._buffer += self.encoder.encode(self._backlog.popleft())
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+
+    def stats(self):
+        return {'sent': self.sent, 'dropped': self.dropped, 'reconnects': self.reconnects,
+                'version': self.encoder.version, 'pending_bytes': len(self._buffer), 'backlog': len(self._backlog)}
+
+
+def _wait_handshake(sender, timeout=PROTOCOL['hello_timeout']):
+    """Block until the sender's HELLO is answered (or timeout), so the first frames already use the agreed version"""
+    deadline = time.monotonic() + timeout
+    while sender._handshake is not None and sender.sock is not None and time.monotonic() < deadline:
+        select.select([sender.sock], [], [], 0.05)
+        sender._poll_handshake()
+
+
+class HybridSender:
+    """
+    Movement over UDP (latest wins), commands over TCP (reliable)
+    Each link numbers its own packets and agrees its own version
+    """
+
+    def __init__(self, host=TRANSPORT['host'], udp_port=TRANSPORT['udp_port'], tcp_port=TRANSPORT['tcp_port']):
+        self.udp = UdpSender(host, udp_port)
+        self.tcp = TcpSender(host, tcp_port)
+
+    @property
+    def encoder(self):
+        return self.tcp.encoder
+
+    def open(self, version=PROTOCOL['version']):
+        version = self.tcp.open(version)
+        # the TCP wait already covered a controller that is up - UDP's answer follows within a round trip
+        self.udp.open(self.tcp.version, wait=False)
+        return version
+
+    def send(self, packet):
+        if packet.kind in COMMAND_KINDS:
+            self.tcp.send(packet)
+        else:
+            self.udp.send(packet)
+            # keep the TCP side reconnecting / draining even while only movement is sent
+            self.tcp.poll()
+
+    def close(self):
+        self.udp.close()
+        self.tcp.close()
+
+    def stats(self):
+        return {'udp': self.udp.stats(), 'tcp': self.tcp.stats()}
+
+
+SENDERS = {'serial': SerialSender, 'udp': UdpSender, 'tcp': TcpSender, 'hybrid': HybridSender}
+
+
+def create_sender(kind=TRANSPORT['type']):
+    """Tracker side link to control_machine.py (call open() before sending)"""
+    if kind not in SENDERS:
+        raise ValueError(f"Unknown transport: {kind}")
+    return SENDERS[kind]()
+
+
+########
+# controller side
+
+def handle_packets(parser, data, data_queue, reply):
+    """Decode received bytes and queue packets, answering HELLO handshakes with reply(bytes)"""
+    received = time.time()
+    for packet in parser.feed(data):
+        if packet.timestamp is not None:
+            tracer.record('link', received - packet.timestamp)
+        if packet.kind == HELLO:
+            version = min(int(packet.a), PROTOCOL['version'])
+            if reply is not None:
+                reply(ack(version))
+            print(f"Tracker connected, using protocol version {version}")
+            continue
+        data_queue.put_nowait(packet)
+
+
+async def read_stream(reader, data_queue, writer=None):
+    """
+    Read a serial port or TCP stream in bulk and queue decoded packets
+    Frame formats are defined in protocol.py - HELLO handshakes are answered with the agreed version
+    """
+    parser = PacketParser()
+
+    while True:
+        try:
+            # read whatever is available (up to READ_SIZE bytes) in one go
+            chunk = await reader.read(READ_SIZE)
+            if not chunk:
+                if reader.at_eof():
+                    break
+                continue  # Skip if no data is received
+
+            handle_packets(parser, chunk, data_queue, writer.write if writer is not None else None)
+
+        except Exception as e:
+            print(f"Error reading link data: {e}")
+            break
+
+    print(f"Link closed, parser stats: {parser.stats()}")
+
+
+class UdpReceiver(asyncio.DatagramProtocol):
+    """Datagrams from the tracker - each holds whole frames, the PacketQueue keeps only the latest movement"""
+
+    def __init__(self, data_queue):
+        self.data_queue = data_queue
+        self.parser = PacketParser()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        handle_packets(self.parser, data, self.data_queue, lambda reply: self.transport.sendto(reply, addr))
+
+    def error_received(self, exc):
+        print(f"UDP link error: {exc}")
+
+
+class TcpReceiver:
+    """TCP server for tracker connections - a reconnecting tracker simply opens a new connection"""
+
+    def __init__(self, data_queue):
+        self.data_queue = data_queue
+        self.server = None
+        self.writers = set()
+
+    async def start(self, host, port):
+        self.server = await asyncio.start_server(self._on_connect, host, port)
+
+    async def _on_connect(self, reader, writer):
+        print(f"TCP link from {writer.get_extra_info('peername')}")
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.writers.add(writer)
+        try:
+            await read_stream(reader, self.data_queue, writer)
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    def close(self):
+        """Stop listening and drop open connections (the server alone leaves them running)"""
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+
+
+async def open_receivers(data_queue, kind=TRANSPORT['type'], bind=TRANSPORT['bind'],
+                         udp_port=TRANSPORT['udp_port'], tcp_port=TRANSPORT['tcp_port']):
+    """Start receiving packets from the tracker into data_queue, returns a list of objects with close()"""
+    if kind not in TYPES:
+        raise ValueError(f"Unknown transport: {kind}")
+    loop = asyncio.get_running_loop()
+    links = []
+
+    if kind == 'serial':
+        import serial_asyncio
+        reader, writer = await serial_asyncio.open_serial_connection(url=TRANSPORT['controller_serial_port'],
+                                                                     baudrate=TRANSPORT['baudrate'])
+        links.append(asyncio.create_task(read_stream(reader, data_queue, writer)))
+        links.append(writer)
+
+    if kind in ('udp', 'hybrid'):
+        transport, _ = await loop.create_datagram_endpoint(lambda: UdpReceiver(data_queue),
+                                                           local_addr=(bind, udp_port))
+        links.append(transport)
+        print(f"Listening for UDP packets on {bind}:{udp_port}")
+
+    if kind in ('tcp', 'hybrid'):
+        receiver = TcpReceiver(data_queue)
+        await receiver.start(bind, tcp_port)
+        links.append(receiver)
+        print(f"Listening for TCP link on {bind}:{tcp_port}")
+
+    return links
+
+
+def close_receivers(links):
+    for link in links:
+        if isinstance(link, asyncio.Task):
+            link.cancel()
+        else:
+            link.close()
@@ -0,0 +1,193 @@
+'''
+Loopback check of the tracker <-> controller links in transport.py (no camera, serial port or input needed)
+    udp / tcp / hybrid   cursor, scroll and command packets arrive intact over 127.0.0.1
+    tcp reconnect        commands sent while the controller is down are delivered once it is back, version re-agreed
+    late controller      a tracker started before the controller upgrades to version 2 once it is up (udp / tcp)
+    v1 controller        a controller that never answers HELLO gets version 1 frames
+    tcp stalled          a controller that stops reading doesn't grow the sender's memory without bound
+Run from repo root: python transport_test.py   (exits 1 if a check fails)
+'''
+
+import asyncio
+import socket
+import sys
+import time
+from protocol import Packet, PacketParser, COMMAND_KINDS, HELLO
+from transport import UdpSender, TcpSender, HybridSender, open_receivers, close_receivers
+
+HOST = '127.0.0.1'
+PACKETS = [Packet(b'R', 0.25, 0.75), Packet(b'S', 0.5, 0.125), Packet(b'C'), Packet(b'L', 1.0, 0.0), Packet(b'M')]
+
+
+def free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def shut(links):
+    close_receivers(links)
+    # let connection handlers see the close before the loop goes away
+    await asyncio.sleep(0.1)
+
+
+async def receive(queue, count, timeout=2.0):
+    """Up to count packets from the receiver queue (fewer if they don't arrive within timeout)"""
+    packets = []
+    deadline = time.monotonic() + timeout
+    while len(packets) < count and time.monotonic() < deadline:
+        try:
+            packets.append(await asyncio.wait_for(queue.get(), deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            break
+    return packets
+
+
+def same(sent, received):
+    """Same packets (any order - hybrid splits them over two links), coordinates within quantisation"""
+    def key(packet):
+        return packet.kind, round(packet.a or 0.0, 3), round(packet.b or 0.0, 3)
+    return sorted(map(key, sent)) == sorted(map(key, received))
+
+
+async def check_link(kind, sender):
+    queue = asyncio.Queue()
+    links = await open_receivers(queue, kind, HOST, UDP_PORT, TCP_PORT)
+    try:
+        version = await asyncio.to_thread(sender.open)
+        for packet in PACKETS:
+            sender.send(packet)
+        received = await receive(queue, len(PACKETS))
+    finally:
+        sender.close()
+        await shut(links)
+    ok = version == 2 and same(PACKETS, received)
+    print(f"{kind:<16} {'ok' if ok else 'FAILED'}   version {version}, {len(received)}/{len(PACKETS)} packets")
+    return ok
+
+
+async def check_reconnect():
+    queue = asyncio.Queue()
+    links = await open_receivers(queue, 'tcp', HOST, tcp_port=TCP_PORT)
+    sender = TcpSender(HOST, TCP_PORT, reconnect_delay=0.05)
+    await asyncio.to_thread(sender.open)
+    sender.send(Packet(b'C'))
+    before = await receive(queue, 1)
+
+    # controller goes away - movement keeps flowing until the sender notices the link is gone
+    await shut(links)
+    deadline = time.monotonic() + 2.0
+    while sender.connected and time.monotonic() < deadline:
+        sender.send(Packet(b'R', 0.5, 0.5))
+        await asyncio.sleep(0.01)
+    commands = [Packet(b'F'), Packet(b'B')]
+    for packet in commands:
+        sender.send(packet)
+
+    # controller back - the next sends reconnect and flush the backlog first
+    links = await open_receivers(queue, 'tcp', HOST, tcp_port=TCP_PORT)
+    try:
+        deadline = time.monotonic() + 2.0
+        while (not sender.reconnects or sender.encoder.version != 2) and time.monotonic() < deadline:
+            sender.send(Packet(b'R', 0.5, 0.5))
+            await asyncio.sleep(0.02)
+        received = await receive(queue, 50, timeout=0.5)
+    finally:
+        sender.close()
+        await shut(links)
+    delivered = [packet.kind for packet in received if packet.kind in COMMAND_KINDS]
+    ok = len(before) == 1 and sender.reconnects == 1 and delivered == [b'F', b'B'] and sender.encoder.version == 2
+    print(f"{'tcp reconnect':<16} {'ok' if ok else 'FAILED'}   {sender.reconnects} reconnect(s), "
+          f"backlogged commands delivered: {delivered}, version {sender.encoder.version}")
+    return ok
+
+
+async def check_late_controller(kind, sender):
+    # tracker first - no answer to HELLO, so it starts on version 1
+    first = await asyncio.to_thread(sender.open)
+    queue = asyncio.Queue()
+    links = await open_receivers(queue, kind, HOST, UDP_PORT, TCP_PORT)
+    try:
+        deadline = time.monotonic() + 3.0
+        while sender.encoder.version != 2 and time.monotonic() < deadline:
+            sender.send(Packet(b'R', 0.5, 0.5))
+            await asyncio.sleep(0.02)
+        sender.send(Packet(b'C'))
+        received = await receive(queue, 200, timeout=0.5)
+    finally:
+        sender.close()
+        await shut(links)
+    # the command after the upgrade carries a sequence number, i.e. went out as version 2
+    upgraded = [packet for packet in received if packet.kind == b'C' and packet.seq is not None]
+    ok = first == 1 and sender.encoder.version == 2 and len(upgraded) == 1
+    print(f"{kind + ' late':<16} {'ok' if ok else 'FAILED'}   version {first} -> {sender.encoder.version}")
+    return ok
+
+
+def check_v1_controller():
+    # controller that reads but doesn't know HELLO (version 1 only)
+    server = socket.create_server((HOST, 0))
+    sender = TcpSender(HOST, server.getsockname()[1])
+    try:
+        version = sender.open()
+        conn, _ = server.accept()
+        sender.send(Packet(b'C'))
+        sender.send(Packet(b'R', 0.25, 0.75))
+        conn.settimeout(1.0)
+        parser = PacketParser()
+        packets = []
+        while len(packets) < 3:
+            data = conn.recv(4096)
+            if not data:
+                break
+            packets += parser.feed(data)
+        conn.close()
+    finally:
+        sender.close()
+        server.close()
+    kinds = [packet.kind for packet in packets]
+    ok = version == 1 and kinds == [HELLO, b'C', b'R'] and all(packet.seq is None for packet in packets[1:])
+    print(f"{'tcp v1':<16} {'ok' if ok else 'FAILED'}   version {version}, frames {kinds}")
+    return ok
+
+
+def check_stalled(count=20000):
+    # controller that accepts the connection and never reads (or answers the handshake)
+    server = socket.create_server((HOST, 0))
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sender = TcpSender(HOST, server.getsockname()[1], backlog=8, max_pending=4096)
+    sender.open(version=1)
+    conn, _ = server.accept()
+    sender.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    try:
+        for i in range(count):
+            sender.send(Packet(b'C') if i % 10 == 0 else Packet(b'R', 0.5, 0.5))
+        stats = sender.stats()
+    finally:
+        sender.close()
+        conn.close()
+        server.close()
+    ok = stats['pending_bytes'] < 4096 + 64 and stats['backlog'] <= 8 and stats['dropped'] > 0
+    print(f"{'tcp stalled':<16} {'ok' if ok else 'FAILED'}   {stats}")
+    return ok
+
+
+async def main():
+    results = [
+        await check_link('udp', UdpSender(HOST, UDP_PORT)),
+        await check_link('tcp', TcpSender(HOST, TCP_PORT)),
+        await check_link('hybrid', HybridSender(HOST, UDP_PORT, TCP_PORT)),
+        await check_reconnect(),
+        await check_late_controller('udp', UdpSender(HOST, UDP_PORT)),
+        await check_late_controller('tcp', TcpSender(HOST, TCP_PORT, reconnect_delay=0.05)),
+        check_v1_controller(),
+        check_stalled(),
+    ]
+    return all(results)
+
+
+UDP_PORT = free_port(socket.SOCK_DGRAM)
+TCP_PORT = free_port()
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)